@@ -5,15 +5,44 @@ from argparse import ArgumentParser
 
 import pygame
 
-from patchworkorange.core import resources
+from patchworkorange.core import headless, replay, resources
+from patchworkorange.core.adventuregraph import load_yaml_data
+from patchworkorange.core.context import GameContext
 from patchworkorange.core.game import Game
 from patchworkorange.core.minigamemanager import MinigameRegistry, MinigameManager
+from patchworkorange.core.profiler import profiler
 from patchworkorange.core.resources import get_data_asset
 
 logger = logging.getLogger(__name__)
 
 
 def main():
+    parser = ArgumentParser(prog="TBD")
+    parser.add_argument("--minigame", help="Pass the name of a minigame to run instead of the full game.")
+    parser.add_argument("--cutscenes", help="Show all the cutscenes in a file")
+    parser.add_argument("--mgargs", help="--minigame needs to be set when using this.")
+    parser.add_argument("--validate", action="store_true", help="Check the graphs and cutscenes for problems and exit")
+    parser.add_argument("--headless", action="store_true",
+                        help="Run without a display or sound device, using SDL's dummy drivers")
+    parser.add_argument("--record", help="Record the input of the session to a file")
+    parser.add_argument("--replay", help="Play back a recorded session, headless and as fast as possible")
+    parser.add_argument("--profile", action="store_true", help="Show frame times per scope, F3 hides and shows them")
+    parser.add_argument("--profile-log", help="Write the frame times of every frame to a JSON lines file")
+    args = parser.parse_args()
+
+    session = None
+    if args.replay:
+        session = replay.Player(args.replay)
+        # run whatever was recorded, unless told otherwise
+        for name in ("minigame", "mgargs", "cutscenes"):
+            if getattr(args, name) is None:
+                setattr(args, name, session.info.get(name))
+    elif args.record:
+        session = replay.Recorder(args.record, minigame=args.minigame, mgargs=args.mgargs, cutscenes=args.cutscenes)
+
+    if args.headless or args.replay:
+        headless.enable()
+
     pygame.mixer.pre_init(44100, -16, 2, 2048)
     pygame.init()
     size = (1280, 720)
@@ -21,26 +50,54 @@ def main():
     pygame.display.set_caption(GAME_TITLE)
     pygame.display.set_mode(size)
 
-    parser = ArgumentParser(prog="TBD")
-    parser.add_argument("--minigame", help="Pass the name of a minigame to run instead of the full game.")
-    parser.add_argument("--cutscenes", help="Show all the cutscenes in a file")
-    parser.add_argument("--mgargs", help="--minigame needs to be set when using this.")
-    args = parser.parse_args()
-
     logging.basicConfig(level=logging.DEBUG)
 
+    # fail now instead of in the middle of a session if assets are missing
+    problems = resources.verify_manifest()
+    if problems:
+        for problem in problems:
+            logger.error(problem)
+        raise resources.MissingAssetException("%d problems found in the asset manifest" % len(problems))
+
     registry = MinigameRegistry()
     registry.locate_minigames()
 
+    if args.validate:
+        # not imported with the package, so python -m patchworkorange.core.validator runs it only once
+        from patchworkorange.core.validator import validate
+        problems = validate(registry)
+        for problem in problems:
+            logger.error(problem)
+        logger.info("%d problems found in the game data" % len(problems))
+        pygame.quit()
+        return
+
     minigame_manager = MinigameManager(registry)
 
+    if args.profile or args.profile_log:
+        profiler.enable(args.profile_log, overlay=args.profile)
+
+    try:
+        if session is None:
+            run(args, minigame_manager)
+        else:
+            try:
+                with session:
+                    run(args, minigame_manager)
+            except replay.ReplayFinishedException as e:
+                logger.info(e)
+    finally:
+        profiler.close()
+
+    pygame.quit()
+
+
+def run(args, minigame_manager):
     if args.cutscenes:
-        import yaml
-        with open(get_data_asset(args.cutscenes)) as fp:
-            data = yaml.load(fp)
+        data = load_yaml_data(get_data_asset(args.cutscenes))
         for scene in data:
             logger.debug("Loading scene \"%s\"" % scene)
-            minigame_manager.run_minigame("Cutscene", {},
+            minigame_manager.run_minigame("Cutscene", GameContext(),
                                           scene_name=scene, scene_file_name=args.cutscenes)
 
     if args.mgargs is not None and args.minigame is None:
@@ -50,16 +107,14 @@ def main():
     if args.minigame is not None:
         logger.debug("Loading minigame \"%s\"" % args.minigame)
         kwargs = mgargs_as_dict(args.mgargs) if args.mgargs is not None else {}
-        minigame_manager.run_minigame(args.minigame, {}, **kwargs)
+        minigame_manager.run_minigame(args.minigame, GameContext(), **kwargs)
         logger.debug("Exiting...")
     else:
         logger.debug("Loading main game")
         # TODO: the initial game state should not be hard-coded...
-        Game(minigame_manager, {"game-state": "wake-up-dialog"}).run()
+        Game(minigame_manager, GameContext({"game-state": "wake-up-dialog"})).run()
         logger.debug("Exiting...")
 
-    pygame.quit()
-
 
 def mgargs_as_dict(minigame_args):
     minigame_args = minigame_args.replace("=", ",")
@@ -1,10 +1,25 @@
+import hashlib
+import heapq
+import os
+import pickle
+import tempfile
 import yaml
 import re
 
+from collections import deque
 from logging import getLogger
+from math import hypot
+
+try:
+    from yaml import CLoader as YAMLLoader
+except ImportError:
+    from yaml import Loader as YAMLLoader
 
 logger = getLogger(__name__)
 
+# Bump this whenever Graph, Vertex or Edge change so old compiled graphs are ignored
+GRAPH_CACHE_VERSION = 3
+
 # Vertex IDs must be all uppercase or numbers and at least 1 character long
 VALID_VERTEX_ID_RE = re.compile("^[A-Z0-9]+$")
 
@@ -34,7 +49,60 @@ def build_graph_from_yaml_data(yaml_data):
 
 def load_yaml_data(filepath):
     with open(filepath) as fob:
-        return yaml.load(fob)
+        return yaml.load(fob, Loader=YAMLLoader)
+
+
+def load_graph(filepath, cache_dir=None):
+    """Load a graph from a YAML file, reusing a compiled copy if the file hasn't changed.
+
+    Compiled graphs are pickled into cache_dir, named after the hash of the YAML file. Without a cache_dir this is
+    the same as building the graph from the YAML data. The graph is pickled before its edges are linked, so pickle
+    doesn't recurse down every path through the graph, and linked after it is loaded.
+    """
+    with open(filepath, 'rb') as fob:
+        raw_data = fob.read()
+
+    cache_path = None
+    if cache_dir is not None:
+        digest = hashlib.sha1(raw_data).hexdigest()
+        cache_path = os.path.join(cache_dir, "%s-v%d.graph" % (digest, GRAPH_CACHE_VERSION))
+        unlinked_graph = None
+        try:
+            with open(cache_path, 'rb') as fob:
+                unlinked_graph = pickle.load(fob)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            logger.warning("Ignoring unreadable compiled graph \"%s\"" % cache_path)
+        if unlinked_graph is not None:
+            return link_graph_edges(unlinked_graph)
+
+    unlinked_graph = create_unlinked_graph(yaml.load(raw_data, Loader=YAMLLoader))
+    verify_graph_has_start_vertex(unlinked_graph)
+
+    if cache_path is not None:
+        save_unlinked_graph(cache_path, unlinked_graph)
+
+    return link_graph_edges(unlinked_graph)
+
+
+def save_unlinked_graph(cache_path, unlinked_graph):
+    # a temp file of its own, the prefetcher may be compiling the same graph
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".tmp")
+    except OSError:
+        logger.warning("Could not write compiled graph \"%s\"" % cache_path)
+        return
+    try:
+        with os.fdopen(fd, 'wb') as fob:
+            pickle.dump(unlinked_graph, fob, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except Exception:
+        logger.warning("Could not write compiled graph \"%s\"" % cache_path)
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
 
 
 def create_unlinked_graph(yaml_data):
@@ -63,7 +131,7 @@ def create_unlinked_graph(yaml_data):
                 edge = Edge(vertex, edge_data["vertex-id"])
                 for pre_req in edge_data.get("pre-requisites", []):
                     edge.traversal_pre_requisites.append(pre_req["name"], pre_req["value"], pre_req["hint"])
-                vertex.edges.append(edge)
+                vertex.add_edge(edge)
             graph.vertex_index[vertex_id] = vertex
         else:
             graph.background = vertex_data["background"]
@@ -96,6 +164,7 @@ def link_graph_edges(unlinked_graph):
                 vertex_ids = (vertex.vertex_id, edge.to_vertex)
                 raise MissingVertexException("Could not find vertex \"%s\" while linking edges on vertex \"%s\"" %
                                              vertex_ids)
+        unlinked_graph.adjacency[vertex.vertex_id] = vertex.edge_index
     return unlinked_graph
 
 
@@ -104,8 +173,16 @@ class Graph:
     def __init__(self):
         self.start_vertex = None
         self.vertex_index = dict()
+        self.adjacency = dict()  # vertex ID -> {to vertex ID: edge}, filled in when the edges are linked
         self.background = None
 
+    def get_edge(self, from_vertex_id, to_vertex_id, default=None):
+        """Return the edge between two vertices, or default if they are not connected"""
+        try:
+            return self.adjacency[from_vertex_id].get(to_vertex_id, default)
+        except KeyError:
+            return default
+
     def __getitem__(self, vertex_id):
         if isinstance(vertex_id, str) and vertex_id.upper() == vertex_id and vertex_id in self.vertex_index:
             return self.vertex_index[vertex_id]
@@ -114,6 +191,8 @@ class Graph:
 
 
 class PreRequisite:
+    __slots__ = ('key', 'value', 'hint')
+
     class NotMetException(Exception):
         pass
 
@@ -127,6 +206,7 @@ class PreRequisite:
 
 
 class PreRequisiteList:
+    __slots__ = ('pre_reqs',)
 
     def __init__(self):
         self.pre_reqs = list()
@@ -137,10 +217,86 @@ class PreRequisiteList:
     def append(self, key, value, hint):
         self.pre_reqs.append(PreRequisite(key, value, hint))
 
+    @property
+    def keys(self):
+        """The context keys read when checking these pre-requisites"""
+        return {pre_req.key for pre_req in self.pre_reqs}
+
     def __iter__(self):
         yield from self.pre_reqs
 
 
+class PreRequisiteTracker:
+    """Keep the results of PreRequisiteLists up to date as the context changes.
+
+    Each watched list is only checked again after one of the context keys it reads has changed. This needs a context
+    that can be subscribed to, like core.context.GameContext. With a plain dict every list is checked on every refresh.
+    Call close when done so the tracker stops listening to the context.
+    """
+
+    def __init__(self, context):
+        self.context = context
+        self._watchers = dict()  # context key -> PreRequisiteLists that read it
+        self._failing = dict()  # PreRequisiteList -> failing pre-requisites
+        self._dirty = set()
+        self._changed = set()  # lists that started or stopped passing since the last refresh
+        self._observable = hasattr(context, "subscribe")
+        if self._observable:
+            context.subscribe(self.on_context_changed)
+
+    def close(self):
+        if self._observable:
+            self.context.unsubscribe(self.on_context_changed)
+
+    def watch(self, pre_req_list):
+        if pre_req_list in self._failing:
+            return
+        for key in pre_req_list.keys:
+            self._watchers.setdefault(key, set()).add(pre_req_list)
+        self._failing[pre_req_list] = None
+        self._dirty.add(pre_req_list)
+
+    def on_context_changed(self, keys):
+        watchers = self._watchers
+        for key in keys:
+            if key in watchers:
+                self._dirty.update(watchers[key])
+
+    def refresh(self):
+        """Check the lists that could have changed and return the ones that started or stopped passing
+
+        This includes lists that changed when they were looked up since the last refresh.
+        """
+        if not self._observable:
+            self._dirty.update(self._failing)
+
+        for pre_req_list in self._dirty:
+            self._check(pre_req_list)
+        self._dirty.clear()
+
+        changed = list(self._changed)
+        self._changed.clear()
+        return changed
+
+    def _check(self, pre_req_list):
+        old = self._failing[pre_req_list]
+        new = pre_req_list.get_failing_pre_requisites(self.context)
+        self._failing[pre_req_list] = new
+        if old is None or bool(old) != bool(new):
+            self._changed.add(pre_req_list)
+
+    def get_failing_pre_requisites(self, pre_req_list):
+        self.watch(pre_req_list)
+        if pre_req_list in self._dirty or not self._observable:
+            # only check this list, the others are left for refresh
+            self._dirty.discard(pre_req_list)
+            self._check(pre_req_list)
+        return self._failing[pre_req_list]
+
+    def passes(self, pre_req_list):
+        return not self.get_failing_pre_requisites(pre_req_list)
+
+
 class Activation:
 
     def __init__(self, command, keyword_args):
@@ -161,12 +317,15 @@ class FailedActivation:
 
 
 class Vertex:
+    __slots__ = ('context', 'coordinates', 'description', 'edges', 'edge_index', 'icon', 'cleared', 'name',
+                 'mini_game_name', 'mini_game_kwargs', 'activation_pre_requisites', 'vertex_id', 'activation')
 
     def __init__(self):
         self.context = dict()
         self.coordinates = (0, 0)
         self.description = None
         self.edges = list()
+        self.edge_index = dict()  # to vertex ID -> edge
         self.icon = None
         self.cleared = None
         self.name = None
@@ -176,12 +335,23 @@ class Vertex:
         self.vertex_id = None
         self.activation = None
 
+    def add_edge(self, edge):
+        """Add an edge leaving this vertex. The edge may still hold the ID of the vertex it goes to."""
+        to_vertex_id = edge.to_vertex if isinstance(edge.to_vertex, str) else edge.to_vertex.vertex_id
+        self.edges.append(edge)
+        # like the old linear search, the first edge to a vertex wins
+        self.edge_index.setdefault(to_vertex_id, edge)
+
+    def get_edge(self, to_vertex_id, default=None):
+        """Return the edge to another vertex, or default if there isn't one"""
+        return self.edge_index.get(to_vertex_id, default)
+
     def get_edge_by_to_vertex_id(self, to_vertex_id):
-        for edge in self.edges:
-            if edge.to_vertex.vertex_id == to_vertex_id:
-                return edge
-        raise InvalidEdgeException("Vertex \"%s\" is not connected to vertex \"%s\" or this vertex does not exist" %
-                                   (self.vertex_id, to_vertex_id))
+        edge = self.edge_index.get(to_vertex_id)
+        if edge is None:
+            raise InvalidEdgeException("Vertex \"%s\" is not connected to vertex \"%s\" or this vertex does not "
+                                       "exist" % (self.vertex_id, to_vertex_id))
+        return edge
 
     @property
     def is_activatable(self):
@@ -202,6 +372,7 @@ class Vertex:
 
 
 class Edge:
+    __slots__ = ('from_vertex', 'to_vertex', 'traversal_pre_requisites')
 
     def __init__(self, from_vertex, to_vertex):
         self.from_vertex = from_vertex
@@ -238,3 +409,116 @@ class Visitor:
 
     def activate_current_vertex(self):
         return self.current_vertex.activate(self.context)
+
+
+def edge_length(edge):
+    """Distance in pixels between the two vertices of an edge"""
+    (x1, y1), (x2, y2) = edge.from_vertex.coordinates, edge.to_vertex.coordinates
+    return hypot(x2 - x1, y2 - y1)
+
+
+def find_reachable_vertex_ids(graph, from_vertex_id, can_traverse=None):
+    """Return the IDs of every vertex that can be reached from a vertex, including itself.
+
+    can_traverse is called with each edge and decides if it can be used. Without it every edge can be used.
+    """
+    reachable = {from_vertex_id}
+    queue = deque(reachable)
+    while queue:
+        for to_vertex_id, edge in graph.adjacency[queue.popleft()].items():
+            if to_vertex_id not in reachable and (can_traverse is None or can_traverse(edge)):
+                reachable.add(to_vertex_id)
+                queue.append(to_vertex_id)
+    return reachable
+
+
+def find_shortest_paths(graph, from_vertex_id, can_traverse=None):
+    """Dijkstra's algorithm over the pixel length of the edges.
+
+    Returns (distances, previous), both dicts keyed by vertex ID. previous holds the vertex ID before each vertex on
+    its shortest path, so the path can be read back with build_path.
+    """
+    distances = {from_vertex_id: 0.0}
+    previous = dict()
+    heap = [(0.0, from_vertex_id)]
+    while heap:
+        distance, vertex_id = heapq.heappop(heap)
+        if distance > distances[vertex_id]:
+            continue
+        for to_vertex_id, edge in graph.adjacency[vertex_id].items():
+            if can_traverse is not None and not can_traverse(edge):
+                continue
+            new_distance = distance + edge_length(edge)
+            if new_distance < distances.get(to_vertex_id, float("inf")):
+                distances[to_vertex_id] = new_distance
+                previous[to_vertex_id] = vertex_id
+                heapq.heappush(heap, (new_distance, to_vertex_id))
+    return distances, previous
+
+
+def build_path(previous, from_vertex_id, to_vertex_id):
+    """Return the vertex IDs from one vertex to another, or None if there is no path"""
+    if to_vertex_id != from_vertex_id and to_vertex_id not in previous:
+        return None
+    path = [to_vertex_id]
+    while path[-1] != from_vertex_id:
+        path.append(previous[path[-1]])
+    path.reverse()
+    return path
+
+
+class PathFinder:
+    """Reachability and shortest paths over the edges that can be traversed in the current context.
+
+    Results are cached per starting vertex and thrown away when a context key read by an edge pre-requisite changes.
+    Like PreRequisiteTracker, caching needs a context that can be subscribed to; with a plain dict nothing is cached.
+    Call close when done so the path finder stops listening to the context.
+    """
+
+    def __init__(self, graph, context):
+        self.graph = graph
+        self.context = context
+        self._reachable = dict()  # from vertex ID -> set of vertex IDs
+        self._paths = dict()  # from vertex ID -> (distances, previous)
+        self._observable = hasattr(context, "subscribe")
+        if self._observable:
+            keys = set()
+            for vertex in graph.vertex_index.values():
+                for edge in vertex.edges:
+                    keys.update(edge.traversal_pre_requisites.keys)
+            context.subscribe(self.invalidate, keys)
+
+    def close(self):
+        if self._observable:
+            self.context.unsubscribe(self.invalidate)
+
+    def invalidate(self, keys=None):
+        self._reachable.clear()
+        self._paths.clear()
+
+    def can_traverse(self, edge):
+        return edge.can_traverse(self.context)
+
+    def reachable_vertex_ids(self, from_vertex_id):
+        if not self._observable:
+            self.invalidate()
+        try:
+            return self._reachable[from_vertex_id]
+        except KeyError:
+            reachable = find_reachable_vertex_ids(self.graph, from_vertex_id, self.can_traverse)
+            self._reachable[from_vertex_id] = reachable
+            return reachable
+
+    def can_reach(self, from_vertex_id, to_vertex_id):
+        return to_vertex_id in self.reachable_vertex_ids(from_vertex_id)
+
+    def shortest_path(self, from_vertex_id, to_vertex_id):
+        """Return the vertex IDs on the shortest path between two vertices, or None if there is no path"""
+        if not self._observable:
+            self.invalidate()
+        try:
+            distances, previous = self._paths[from_vertex_id]
+        except KeyError:
+            distances, previous = find_shortest_paths(self.graph, from_vertex_id, self.can_traverse)
+            self._paths[from_vertex_id] = distances, previous
+        return build_path(previous, from_vertex_id, to_vertex_id)
@@ -0,0 +1,458 @@
+"""
+Benchmark every minigame and a few functions that are known to be hot
+
+    python -m patchworkorange.core.benchmark --output baseline.json
+    python -m patchworkorange.core.benchmark --compare baseline.json
+
+A short run of one minigame makes a smoke test, it exits with an error
+status if a minigame raised:
+
+    python -m patchworkorange.core.benchmark --minigame Xbill --seconds 1 --no-functions
+
+Every registered minigame runs headless for a number of simulated
+seconds at 60 fps.  A seeded monkey presses the arrow keys, space and
+return, moves the mouse and clicks around, and pygame timers run on the
+simulated clock, so the same seed gives the same run.  Clocks don't wait,
+so frames per second is how fast the game can go, not the frame rate it
+asks for.  Update and draw times come from the profiler scopes.
+
+Surfaces are counted when they are made by pygame.Surface, the functions
+in pygame.transform and pygame.image, or Font.render.  Surfaces made by
+Surface methods, like convert, aren't seen.
+
+Results are written as JSON.  When comparing, every number is printed
+next to the baseline with the change in percent.
+"""
+import json
+import logging
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from argparse import ArgumentParser
+from itertools import count
+from time import perf_counter
+
+import pygame
+
+from patchworkorange.core import headless, replay, resources
+from patchworkorange.core.adventuregraph import build_graph_from_yaml_data, load_yaml_data
+from patchworkorange.core.context import GameContext
+from patchworkorange.core.game import Game
+from patchworkorange.core.minigamemanager import MinigameRegistry, MinigameManager
+from patchworkorange.core.prefetch import activation_minigames
+from patchworkorange.core.profiler import Profiler, profiler
+from patchworkorange.core.simplefsm import SimpleFSM
+from patchworkorange.core.ui import GraphicBox, draw_text, get_font_cache, text_cache
+from patchworkorange.minigames.cutscene.Cutscene import dialog_events
+from patchworkorange.minigames.jackin.Jackin import Jackin
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+SCREEN_SIZE = 1280, 720
+FRAME_RATE = 60
+ACTION_INTERVAL = 200  # simulated ms between things the monkey does
+BUSY_CALLS = 1000  # event.get calls without a clock tick that count as a frame
+MONKEY_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN, pygame.K_SPACE, pygame.K_RETURN)
+
+# a round of dialog events that brings the fsm back to where it started
+DIALOG_ROUND = ('open', 'text', 'text-ok', 'press', 'music', 'sound', 'close')
+
+LOREM = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt ut labore et "
+         "dolore magna aliqua. Ut enim ad minim veniam, quis nostrud exercitation ullamco laboris nisi ut aliquip "
+         "ex ea commodo consequat.")
+
+
+def get_peak_rss():
+    """ Peak resident set size of the process in KiB, or None where it can't be measured """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def time_call(func, number):
+    """ Best time of one call in ms, out of 5 runs of number calls """
+    return min(timeit.repeat(func, repeat=5, number=number)) / number * 1000
+
+
+class ScriptedInput(replay.Session):
+    """ Feed a minigame monkey input for a number of simulated seconds
+
+    Works like playing back a recording, except that the input is made up
+    as the game goes.  ReplayFinishedException is raised from the clock
+    when the time is up.
+    """
+
+    def __init__(self, seconds, seed=0):
+        super(ScriptedInput, self).__init__(None)
+        self.seed = seed
+        self.duration = seconds * 1000
+        self.time = 0.0  # simulated ms
+        self._rng = random.Random(seed)
+        self._queue = list()
+        self._timers = dict()  # event type -> [interval, due]
+        self._keys = set()
+        self._next_action = 0
+        self._busy = 0
+
+    def start(self):
+        super(ScriptedInput, self).start()
+        thread = threading.current_thread()
+        real_sleep = time.sleep
+        self.patch(pygame.event, "get", lambda *args, **kwargs: self.get_events())
+        self.patch(pygame.key, "get_pressed", lambda: replay.KeyState(self._keys))
+        self.patch(pygame.time, "Clock", lambda: _ScriptedClock(self))
+        self.patch(pygame.time, "set_timer", self.set_timer)
+        self.patch(time, "sleep", lambda seconds: None if threading.current_thread() is thread
+                   else real_sleep(seconds))
+
+    def set_timer(self, event_type, ms, *args):
+        if ms:
+            self._timers[event_type] = [ms, self.time + ms]
+        else:
+            self._timers.pop(event_type, None)
+
+    def tick(self):
+        """ Advance the simulated time by one frame and return the ms it took """
+        if self.time >= self.duration:
+            raise replay.ReplayFinishedException("%d simulated seconds are up" % (self.duration // 1000))
+
+        last = self.time
+        self.time += 1000.0 / FRAME_RATE
+        self.ticks += 1
+        self._busy = 0
+
+        for event_type, timer in self._timers.items():
+            while timer[1] <= self.time:
+                self._queue.append(pygame.event.Event(event_type, {}))
+                timer[1] += timer[0]
+
+        while self._next_action <= self.time:
+            self.act()
+            self._next_action += ACTION_INTERVAL
+
+        return int(self.time) - int(last)
+
+    def act(self):
+        rng = self._rng
+        roll = rng.random()
+        pos = rng.randrange(SCREEN_SIZE[0]), rng.randrange(SCREEN_SIZE[1])
+        if roll < .6:
+            key = rng.choice(MONKEY_KEYS)
+            if key in self._keys:
+                self._keys.discard(key)
+                self._queue.append(pygame.event.Event(pygame.KEYUP, {"key": key, "mod": 0}))
+            else:
+                self._keys.add(key)
+                self._queue.append(pygame.event.Event(pygame.KEYDOWN,
+                                                      {"key": key, "mod": 0, "unicode": "", "scancode": 0}))
+        elif roll < .8:
+            self._queue.append(pygame.event.Event(pygame.MOUSEMOTION,
+                                                  {"pos": pos, "rel": (0, 0), "buttons": (0, 0, 0)}))
+        else:
+            self._queue.append(pygame.event.Event(pygame.MOUSEBUTTONDOWN, {"pos": pos, "button": 1}))
+            self._queue.append(pygame.event.Event(pygame.MOUSEBUTTONUP, {"pos": pos, "button": 1}))
+
+    def get_events(self):
+        # loops that never tick a clock still need time to pass
+        self._busy += 1
+        if self._busy >= BUSY_CALLS:
+            self.tick()
+        events, self._queue = self._queue, list()
+        return events
+
+
+class _ScriptedClock(object):
+    def __init__(self, session):
+        self._session = session
+        self._time = 0
+
+    def tick(self, framerate=0):
+        self._time = self._session.tick()
+        return self._time
+
+    def get_time(self):
+        return self._time
+
+    def get_rawtime(self):
+        return self._time
+
+    def get_fps(self):
+        return 1000.0 / self._time if self._time else 0.0
+
+
+class SurfaceCounter(object):
+    """ Count the surfaces made while in the with block """
+    TRANSFORMS = ('scale', 'smoothscale', 'rotate', 'rotozoom', 'flip', 'scale2x', 'chop')
+    IMAGES = ('load', 'fromstring', 'frombuffer')
+
+    def __init__(self):
+        self.count = 0
+        self._patched = list()
+
+    def __enter__(self):
+        replacements = {
+            pygame.Surface: self.counting_surface(pygame.Surface),
+            pygame.font.Font: self.counting_font(pygame.font.Font),
+        }
+        for module, names in ((pygame.transform, self.TRANSFORMS), (pygame.image, self.IMAGES)):
+            for name in names:
+                function = getattr(module, name, None)
+                if function is not None:
+                    replacements[function] = self.counting(function)
+
+        # names imported with "from pygame.transform import scale" have to be replaced too
+        modules = [pygame, pygame.font, pygame.transform, pygame.image]
+        modules.extend(module for name, module in list(sys.modules.items())
+                       if name.startswith("patchworkorange") and module is not None)
+        for module in modules:
+            for name, value in list(vars(module).items()):
+                try:
+                    replacement = replacements.get(value)
+                except TypeError:  # unhashable
+                    continue
+                if replacement is not None:
+                    self._patched.append((module, name, value))
+                    setattr(module, name, replacement)
+        return self
+
+    def __exit__(self, *exc_info):
+        while self._patched:
+            module, name, value = self._patched.pop()
+            setattr(module, name, value)
+
+    def counting(self, function):
+        def counted(*args, **kwargs):
+            self.count += 1
+            return function(*args, **kwargs)
+        return counted
+
+    def counting_surface(self, base):
+        counter = self
+
+        class CountingSurface(base):
+            def __init__(self, *args, **kwargs):
+                counter.count += 1
+                super(CountingSurface, self).__init__(*args, **kwargs)
+
+        return CountingSurface
+
+    def counting_font(self, base):
+        counter = self
+
+        class CountingFont(base):
+            def render(self, *args, **kwargs):
+                counter.count += 1
+                return super(CountingFont, self).render(*args, **kwargs)
+
+        return CountingFont
+
+
+def get_script_kwargs():
+    """ Keyword args of the first time each minigame is used in the game script or its graphs
+
+    Some minigames are only launched from a vertex of an adventure graph,
+    so the graphs the script visits are searched too.
+    """
+    kwargs = dict()
+    script = Game.build_script()
+    for name, step_kwargs in script:
+        kwargs.setdefault(name, step_kwargs)
+
+    for name, step_kwargs in script:
+        if name != "GraphView" or not step_kwargs.get("graph_yaml"):
+            continue
+        graph_data = load_yaml_data(resources.get_data_asset(step_kwargs["graph_yaml"]))
+        for vertex_data in graph_data.values():
+            for minigame_name, minigame_kwargs in activation_minigames(vertex_data.get("activation")):
+                kwargs.setdefault(minigame_name, minigame_kwargs or {})
+    return kwargs
+
+
+def benchmark_minigame(minigame_manager, name, kwargs, seconds, seed):
+    pygame.display.set_mode(SCREEN_SIZE)
+    # load everything again, so fonts are made by the counter
+    resources.asset_cache.clear()
+    profiler.reset()
+    first_frame = profiler.frames
+    counter = SurfaceCounter()
+    session = ScriptedInput(seconds, seed)
+
+    started = perf_counter()
+    try:
+        with session, counter:
+            minigame_manager.run_minigame(name, GameContext(), **kwargs)
+    except replay.ReplayFinishedException:
+        pass
+    elapsed = perf_counter() - started
+
+    frames = profiler.frames - first_frame
+    result = {
+        "frames": frames,
+        "simulated_seconds": round(session.time / 1000, 3),
+        "fps": frames / elapsed if elapsed else None,
+        "surfaces_per_frame": counter.count / frames if frames else None,
+        "peak_rss_kb": get_peak_rss(),
+    }
+    for scope in ("update", "draw"):
+        values = profiler.get_percentiles(scope, name) or dict()
+        result["%s_p50_ms" % scope] = values.get(50)
+        result["%s_p99_ms" % scope] = values.get(99)
+    return result
+
+
+def benchmark_minigames(registry, names=None, seconds=10, seed=0):
+    minigame_manager = MinigameManager(registry)
+    script_kwargs = get_script_kwargs()
+
+    # keep every frame of a run for the percentiles
+    profiler.WINDOW = max(Profiler.WINDOW, seconds * FRAME_RATE)
+    profiler.enable()
+    results = dict()
+    try:
+        for name in names or sorted(registry.registry):
+            logger.info("benchmarking %s", name)
+            try:
+                results[name] = benchmark_minigame(minigame_manager, name, script_kwargs.get(name, {}), seconds, seed)
+            except Exception as e:
+                logger.exception("%s failed", name)
+                results[name] = {"error": repr(e)}
+    finally:
+        profiler.close()
+    return results
+
+
+def benchmark_functions():
+    surface = pygame.Surface(SCREEN_SIZE)
+    font = resources.load_font("pixChicago.ttf", 16)
+    text_rect = pygame.Rect(0, 0, 400, 300)
+
+    def draw_text_uncached():
+        text_cache.clear()
+        get_font_cache(font).clear()
+        draw_text(surface, LOREM, text_rect, font)
+
+    box = GraphicBox(resources.load_image("border-default.png"), fill_tiles=True)
+    box_rect = pygame.Rect(0, 0, 400, 200)
+    box_sizes = count()
+
+    def draw_box_resized():
+        # a new size every call, so every box is baked
+        box.draw(surface, box_rect.inflate(next(box_sizes) % 100, 0))
+
+    graph_data = load_yaml_data(resources.get_data_asset("day-1.yaml"))
+
+    fsm = SimpleFSM(dialog_events, 'closed')
+
+    def dialog_round():
+        for event in DIALOG_ROUND:
+            fsm(event)
+
+    jackin = Jackin()
+    font_args = 'Apple ][.ttf', 8, 10, pygame.Color('goldenrod')
+    with tempfile.TemporaryDirectory() as glyph_cache_dir:
+        # the first call renders and saves the atlas, the others map it
+        generate_font_cached = time_call(lambda: jackin.generate_font(*font_args, cache_dir=glyph_cache_dir), 20)
+        jackin.cache = None  # unmap the atlas before the folder is removed
+
+    return {
+        "draw_text": {"ms": time_call(lambda: draw_text(surface, LOREM, text_rect, font), 200)},
+        "draw_text_uncached": {"ms": time_call(draw_text_uncached, 50)},
+        "GraphicBox.draw": {"ms": time_call(lambda: box.draw(surface, box_rect), 200)},
+        "GraphicBox.draw_resized": {"ms": time_call(draw_box_resized, 50)},
+        "build_graph_from_yaml_data": {"ms": time_call(lambda: build_graph_from_yaml_data(graph_data), 50)},
+        "SimpleFSM.__call__": {"ms": time_call(dialog_round, 1000) / len(DIALOG_ROUND)},
+        "Jackin.generate_font": {"ms": time_call(lambda: jackin.generate_font(*font_args), 3)},
+        "Jackin.generate_font_cached": {"ms": generate_font_cached},
+    }
+
+
+def run(names=None, seconds=10, seed=0, functions=True):
+    registry = MinigameRegistry()
+    registry.locate_minigames()
+    results = {
+        "version": VERSION,
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+        },
+        "seconds": seconds,
+        "seed": seed,
+        "functions": benchmark_functions() if functions else dict(),
+        "minigames": benchmark_minigames(registry, names, seconds, seed),
+    }
+    return results
+
+
+def compare(results, baseline):
+    """ Lines with every number next to the one in the baseline """
+    lines = list()
+    for section in ("functions", "minigames"):
+        for name, metrics in sorted(results[section].items()):
+            old_metrics = baseline.get(section, dict()).get(name, dict())
+            for metric, value in sorted(metrics.items()):
+                old = old_metrics.get(metric)
+                if isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+                    change = "%+.1f%%" % ((value - old) / old * 100)
+                else:
+                    change = ""
+                lines.append("%-40s %12s %12s %8s" % ("%s %s" % (name, metric), format_value(value),
+                                                      format_value(old), change))
+    return lines
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return "%.3f" % value
+    return "-" if value is None else str(value)
+
+
+def main():
+    parser = ArgumentParser(prog="benchmark")
+    parser.add_argument("--minigame", action="append", help="Only benchmark this minigame, can be repeated")
+    parser.add_argument("--seconds", type=int, default=10, help="Simulated seconds to run every minigame for")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random numbers and the monkey")
+    parser.add_argument("--no-functions", action="store_true", help="Don't benchmark the functions")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Compare the results to this JSON file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    headless.enable()
+    pygame.mixer.pre_init(44100, -16, 2, 2048)
+    pygame.init()
+    pygame.display.set_mode(SCREEN_SIZE)
+
+    results = run(args.minigame, args.seconds, args.seed, not args.no_functions)
+    pygame.quit()
+
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(results, fp, indent=2, sort_keys=True)
+
+    baseline = dict()
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)
+    for line in compare(results, baseline):
+        print(line)
+
+    failed = sorted(name for name, result in results["minigames"].items() if "error" in result)
+    if failed:
+        logger.error("%d minigames failed: %s", len(failed), ", ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,19 +3,11 @@ from functools import partial
 import pygame
 from animation import Animation, Task, remove_animations_of
 
-from patchworkorange.core.resources import get_image_asset, get_font_asset
+from patchworkorange.core.resources import load_image, load_font
 from patchworkorange.core.supersprite import SuperSprite
 from patchworkorange.core.ui import GraphicBox, draw_text
 
 
-def load_image(filename):
-    return pygame.image.load(get_image_asset(filename))
-
-
-def load_font(name, size):
-    return pygame.font.Font(get_font_asset(name), size)
-
-
 class Clippie(SuperSprite):
     fg_color = 0, 0, 0
     bg_color = 255, 255, 255
@@ -38,14 +30,33 @@ class Clippie(SuperSprite):
         self._animation_dict = dict()
         self._font = load_font('IHATCS__.TTF', 24)
 
+        # only look at the queue in the context after it was changed
+        self._context_queue_changed = True
+        self._observable = hasattr(context, 'subscribe')
+        if self._observable:
+            context.subscribe(self.on_context_changed, ('clippie_queue',))
+
+    def on_context_changed(self, keys):
+        self._context_queue_changed = True
+
+    def close(self):
+        """Stop listening to the context"""
+        if self._observable:
+            self.context.unsubscribe(self.on_context_changed)
+
     # HACK: hardcoding is bad
     def update(self, *args):
         super(Clippie, self).update(*args)
 
+        if not self._context_queue_changed:
+            return
+
+        # a plain dict can't say when it changes, so keep checking it
+        self._context_queue_changed = not self._observable
         if self.context['clippie_queue']:
             for i in self.context['clippie_queue']:
                 self.queue_text(i)
-        self.context['clippie_queue'] = list()
+            self.context['clippie_queue'] = list()
 
     @property
     def current_message(self):
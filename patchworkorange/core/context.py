@@ -0,0 +1,129 @@
+from contextlib import contextmanager
+
+_missing = object()
+
+
+class GameContext(dict):
+    """ The game context, a dict that tells subscribers which keys changed
+
+    Subscribers are called with a set of the keys that changed.  Writing
+    the value a key already has is not a change.
+
+    Every change bumps the version of the context and of the keys that
+    changed, so code that runs each frame can compare a version number
+    instead of the values themselves.  Changes made inside a batch are
+    reported together when the outermost batch ends.
+
+    Values are not copied, so mutating a value in place (appending to a
+    list, for example) is not seen as a change.  Assign a new value instead.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(GameContext, self).__init__(*args, **kwargs)
+        self.version = 0
+        self._key_versions = dict()
+        self._subscribers = list()
+        self._batch_depth = 0
+        self._pending = set()
+
+    def subscribe(self, callback, keys=None):
+        """ Call callback with the set of changed keys after every change
+
+        :param callback: callable taking a set of keys
+        :param keys: only call back when one of these keys changed, or None for every change
+        """
+        if keys is not None:
+            keys = frozenset(keys)
+        self._subscribers.append((callback, keys))
+
+    def unsubscribe(self, callback):
+        self._subscribers = [i for i in self._subscribers if i[0] != callback]
+
+    def get_version(self, key):
+        """ Version of the context when key last changed, 0 if it never did """
+        return self._key_versions.get(key, 0)
+
+    @contextmanager
+    def batch(self):
+        """ Report all the changes made in the with block as one change """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                keys, self._pending = self._pending, set()
+                self.notify(keys)
+
+    def notify(self, keys):
+        if not keys:
+            return
+        if self._batch_depth:
+            self._pending.update(keys)
+            return
+
+        self.version += 1
+        for key in keys:
+            self._key_versions[key] = self.version
+        for callback, wanted in list(self._subscribers):
+            if wanted is None or not wanted.isdisjoint(keys):
+                callback(keys)
+
+    def snapshot(self):
+        """ Return a copy of the context that can be passed to restore
+
+        The copy is shallow, which is cheap and fine as long as values are
+        replaced instead of mutated.
+        """
+        return dict(self)
+
+    def restore(self, snapshot):
+        """ Put the context back the way it was when snapshot was taken
+
+        Subscribers are only told about the keys that are different.
+        """
+        with self.batch():
+            for key in [key for key in self if key not in snapshot]:
+                del self[key]
+            self.update(snapshot)
+
+    def __setitem__(self, key, value):
+        old = self.get(key, _missing)
+        super(GameContext, self).__setitem__(key, value)
+        if old is _missing or old != value:
+            self.notify({key})
+
+    def __delitem__(self, key):
+        super(GameContext, self).__delitem__(key)
+        self.notify({key})
+
+    def update(self, *args, **kwargs):
+        changed = set()
+        for key, value in dict(*args, **kwargs).items():
+            old = self.get(key, _missing)
+            super(GameContext, self).__setitem__(key, value)
+            if old is _missing or old != value:
+                changed.add(key)
+        self.notify(changed)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        had_key = key in self
+        value = super(GameContext, self).pop(key, *default)
+        if had_key:
+            self.notify({key})
+        return value
+
+    def popitem(self):
+        key, value = super(GameContext, self).popitem()
+        self.notify({key})
+        return key, value
+
+    def clear(self):
+        keys = set(self)
+        super(GameContext, self).clear()
+        self.notify(keys)
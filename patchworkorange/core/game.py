@@ -1,55 +1,99 @@
 import pygame
 
+from patchworkorange.core.prefetch import prefetcher
+
 
 class Game:
+    # how many steps of the script to prefetch ahead of the current one
+    PREFETCH_STEPS = 2
 
     def __init__(self, minigame_manager, game_context):
         self.minigame_manager = minigame_manager
         self.game_context = game_context
         self.surface = None
+        self.script = self.build_script()
+        self.step = 0
+
+    @staticmethod
+    def build_script():
+        """The whole game as a list of (step name, keyword args)
+
+        Step names are either the name of a minigame or "set-context" and
+        "replace-context" which change the game context in between.
+        """
+        return [
+            ("Title", {}),
+            ("set-context", {'show_clippie': False}),
+
+            # Purple patch (donatello.patch)
+            ("Cutscene", {"scene_name": "wake-up", "scene_file_name": "cutscenes.yaml"}),
+            ("GraphView", {"graph_yaml": "day-1.yaml", "graph_tmx": "real-life.tmx"}),
+            ("Cutscene", {"scene_name": "end-of-day-one", "scene_file_name": "cutscenes.yaml"}),
+            ("Jackin", {}),
+            ("GraphView", {"graph_yaml": "mission-1.yaml", "graph_tmx": "network.tmx"}),
+            ("Cutscene", {"scene_name": "end-of-mission-one", "scene_file_name": "cutscenes.yaml"}),
+
+            # Blue patch (leonardo.patch)
+            ("GraphView", {"graph_yaml": "day-2.yaml", "graph_tmx": "real-life.tmx"}),
+            ("Jackin", {}),
+            ("GraphView", {"graph_yaml": "mission-2.yaml", "graph_tmx": "network.tmx"}),
+            ("Cutscene", {"scene_name": "end-of-mission-two", "scene_file_name": "cutscenes.yaml"}),
+
+            # Red patch (raphael.patch)
+            ("GraphView", {"graph_yaml": "day-3.yaml", "graph_tmx": "real-life.tmx"}),
+            ("replace-context", {'show_clippie': True, 'clippie_queue': [
+                "I see that you are jacked in.",
+                "Would you like help with that?",
+                "Don't forget to pick up the red diskette from Danny.",
+                "Danny is at the pawn shop.",
+                "Do you know where the pawn shop is?",
+                "That's where you will find Danny.",
+                "...with the red diskette.",
+                "...which has the patch.",
+                "Danny's a great guy, you know?",
+                "Actually, I have no idea about that.",
+                "I'm just version 1.0",
+            ]}),
+            ("Jackin", {}),
+            ("GraphView", {"graph_yaml": "mission-3.yaml", "graph_tmx": "network.tmx"}),
+
+            ("CreditRoll", {}),
+        ]
 
     def run(self):
         self.surface = pygame.display.get_surface()
 
-        self.show_title()
-
-        self.game_context['show_clippie'] = False
-
-        # Purple patch (donatello.patch)
-        self.show_cutscene("wake-up", "cutscenes.yaml")
-        self.show_graph("day-1.yaml", "real-life.tmx")
-        self.show_cutscene("end-of-day-one", "cutscenes.yaml")
-        self.show_jackin()
-        self.show_graph("mission-1.yaml", "network.tmx")
-        self.show_cutscene("end-of-mission-one", "cutscenes.yaml")
-
-        # Blue patch (leonardo.patch)
-        self.show_graph("day-2.yaml", "real-life.tmx")
-        self.show_jackin()
-        self.show_graph("mission-2.yaml", "network.tmx")
-        self.show_cutscene("end-of-mission-two", "cutscenes.yaml")
-
-        # Red patch (raphael.patch)
-        self.show_graph("day-3.yaml", "real-life.tmx")
-        self.game_context = {'show_clippie': True, 'clippie_queue': [
-            "I see that you are jacked in.",
-            "Would you like help with that?",
-            "Don't forget to pick up the red diskette from Danny.",
-            "Danny is at the pawn shop.",
-            "Do you know where the pawn shop is?",
-            "That's where you will find Danny.",
-            "...with the red diskette.",
-            "...which has the patch.",
-            "Danny's a great guy, you know?",
-            "Actually, I have no idea about that.",
-            "I'm just version 1.0",
-        ]}
-        self.show_jackin()
-        self.show_graph("mission-3.yaml", "network.tmx")
-
-        self.show_credit_roll()
+        for index, (name, kwargs) in enumerate(self.script):
+            self.step = index
+            prefetcher.prefetch(self.minigame_manager.minigame_registry, self.upcoming_minigames())
+            self.run_step(name, kwargs)
+
+        prefetcher.stop()
         pygame.quit()
 
+    def upcoming_minigames(self):
+        """The minigames of the current step and the next few steps after it"""
+        steps = self.script[self.step:]
+        return [step for step in steps if step[0] not in ("set-context", "replace-context")][:self.PREFETCH_STEPS]
+
+    def run_step(self, name, kwargs):
+        if name == "Title":
+            self.show_title()
+        elif name == "Cutscene":
+            self.show_cutscene(**kwargs)
+        elif name == "GraphView":
+            self.show_graph(**kwargs)
+        elif name == "Jackin":
+            self.show_jackin()
+        elif name == "CreditRoll":
+            self.show_credit_roll()
+        elif name == "set-context":
+            self.game_context.update(kwargs)
+        elif name == "replace-context":
+            self.game_context.restore(kwargs)
+        else:
+            raise ValueError(name)
+
     def show_title(self):
         self.minigame_manager.run_minigame("Title", None)
         self.cleanup_pygame()
@@ -0,0 +1,55 @@
+"""
+Run the game without a display or sound device
+
+enable() points SDL at its dummy video and audio drivers, so the display
+surface is just an offscreen surface and nothing is ever shown or heard.
+It has to be called before pygame.init.  Minigames draw like they always
+do but call flip, update and fadeout_music from here instead of from
+pygame, which skips the calls that are useless or block when headless.
+flip and update also end the frame for the profiler and draw its overlay.
+"""
+import os
+
+import pygame
+
+from patchworkorange.core.profiler import profiler
+
+_enabled = False
+
+
+def enable():
+    global _enabled
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    _enabled = True
+
+
+def is_enabled():
+    return _enabled
+
+
+def flip():
+    profiler.draw_overlay(pygame.display.get_surface())
+    with profiler.scope("flip"):
+        if not _enabled:
+            pygame.display.flip()
+    profiler.end_frame()
+
+
+def update(rects=None):
+    overlay = profiler.draw_overlay(pygame.display.get_surface())
+    with profiler.scope("flip"):
+        if not _enabled:
+            if rects is None:
+                pygame.display.update()
+            else:
+                pygame.display.update(rects if overlay is None else list(rects) + [overlay])
+    profiler.end_frame()
+
+
+def fadeout_music(time):
+    """ Fade out the music, which blocks until it is done, or just stop it when headless """
+    if _enabled:
+        pygame.mixer.music.stop()
+    else:
+        pygame.mixer.music.fadeout(time)
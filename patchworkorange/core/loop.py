@@ -0,0 +1,81 @@
+"""
+Fixed timestep game loop for the arcade minigames
+
+The simulation always advances in steps of the same length, no matter
+how fast frames are drawn, so movement is the same on every computer and
+a fast ball can't skip through a brick because one frame took long.
+Frames are drawn at FRAME_RATE and the clock sleeps in between, instead
+of polling the clock hundreds of times a second.
+
+render is passed how far the time between two steps has gone, from 0.0
+to 1.0, so moving things can be drawn between where they were and where
+they are now.
+
+Games should take their random numbers from loop.rng.  Together with the
+same input, the same seed plays the same game.
+"""
+import random
+from logging import getLogger
+
+import pygame
+
+from patchworkorange.core import headless
+from patchworkorange.core.profiler import profiler
+
+logger = getLogger(__name__)
+
+_seed = None
+
+
+def set_seed(seed):
+    """ Seed the loops created after this, or None to pick a new seed for each """
+    global _seed
+    _seed = seed
+
+
+def interpolate(previous, current, alpha):
+    """ Point between previous and current, alpha being 0.0 for previous and 1.0 for current """
+    return tuple(a + (b - a) * alpha for a, b in zip(previous, current))
+
+
+class FixedStepLoop(object):
+    UPDATE_FREQUENCY = 300  # simulation steps per second
+    FRAME_RATE = 60
+    MAX_STEPS = 30  # steps to catch up per frame before the game is allowed to slow down
+
+    def __init__(self, update, render, update_frequency=None, frame_rate=None, max_steps=None, seed=None):
+        """
+        :param update: callable taking the step length in ms, returns False to stop the loop
+        :param render: callable taking the interpolation alpha
+        """
+        self.update = update
+        self.render = render
+        self.step = 1000.0 / (update_frequency or self.UPDATE_FREQUENCY)
+        self.frame_rate = frame_rate or self.FRAME_RATE
+        self.max_steps = max_steps or self.MAX_STEPS
+        if seed is None:
+            seed = _seed if _seed is not None else random.randrange(2 ** 32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.steps = 0
+
+    def run(self):
+        """ Update and render until update returns False """
+        logger.debug("running with seed %d", self.seed)
+        clock = pygame.time.Clock()
+        max_elapsed = self.step * self.max_steps
+        accumulator = 0.0
+        while True:
+            # after a long stall drop the time that can't be caught up on
+            accumulator += min(clock.tick(self.frame_rate), max_elapsed)
+            while accumulator >= self.step:
+                with profiler.scope("update"):
+                    running = self.update(self.step)
+                if not running:
+                    return
+                accumulator -= self.step
+                self.steps += 1
+
+            with profiler.scope("draw"):
+                self.render(accumulator / self.step)
+            headless.flip()
@@ -2,6 +2,8 @@ from abc import ABC, abstractmethod
 from logging import getLogger
 
 from patchworkorange.core.adventuregraph import PreRequisiteList
+from patchworkorange.core.profiler import profiler
+from patchworkorange.core.sound import sound_manager
 
 logger = getLogger(__name__)
 
@@ -9,6 +11,9 @@ logger = getLogger(__name__)
 class Minigame(ABC):
     GAME_NAME = "UNDEFINED"
 
+    # (kind, name, *params) tuples passed to the asset cache, see core.resources.AssetCache
+    ASSETS = tuple()
+
     def __init__(self):
         self.minigame_manager = None
         self.instant_win = False
@@ -21,6 +26,11 @@ class Minigame(ABC):
     def run(self, context):
         pass
 
+    @classmethod
+    def get_assets(cls, **kwargs):
+        """Assets the minigame will load when created with these keyword args"""
+        return list(cls.ASSETS)
+
 # TODO: build PostRunAction factory
 
 
@@ -69,10 +79,17 @@ class MinigameManager:
         self.minigame_registry = minigame_registry
 
     def run_minigame(self, game_name, game_context, post_run_actions=list(), **kwargs):
-        minigame = self.minigame_registry[game_name](**kwargs)
-        minigame.minigame_manager = self
-        minigame.initialize(game_context)
-        minigame.run(game_context)
+        with profiler.minigame_scope(game_name):
+            minigame_class = self.minigame_registry[game_name]
+            try:
+                sound_manager.preload(minigame_class.get_assets(**kwargs))
+            except Exception:
+                logger.exception("Could not preload the sounds of %s", game_name)
+
+            minigame = minigame_class(**kwargs)
+            minigame.minigame_manager = self
+            minigame.initialize(game_context)
+            minigame.run(game_context)
 
         if post_run_actions:
             # this is technically recursive, try not to nest more than 3000
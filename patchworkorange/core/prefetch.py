@@ -0,0 +1,135 @@
+"""
+Load assets on a worker thread before the minigames that need them start
+
+Minigames declare what they load in Minigame.get_assets, the Game script
+says which minigames come next, and the adventure graph says which
+minigames the player can launch from where they are standing.  Every
+call to prefetch replaces whatever was still waiting, so work for a path
+the player didn't take is dropped.  The minigames next to the player go
+in front of the script's, which stay queued after them.
+
+The worker only decodes images.  Fonts and sounds are just read into
+memory, they are created on the main thread the first time they are
+used, see AssetCache.warm.
+"""
+import queue
+import threading
+from logging import getLogger
+
+from patchworkorange.core.resources import asset_cache
+
+logger = getLogger(__name__)
+
+
+class Prefetcher:
+
+    def __init__(self, cache=asset_cache, maxsize=16):
+        self.cache = cache
+        self.generation = 0
+        self._planned = list()  # minigames of the last prefetch call
+        self._queue = queue.Queue(maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not self.running:
+            self._thread = threading.Thread(target=self._run, name="prefetcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self.running:
+            self.cancel()
+            self._queue.put((None, None, None))
+            self._thread.join()
+        self._thread = None
+
+    def cancel(self):
+        """ Drop everything that is waiting to be loaded """
+        with self._lock:
+            self.generation += 1
+            try:
+                while True:
+                    self._queue.get_nowait()
+            except queue.Empty:
+                pass
+
+    def prefetch(self, registry, minigames):
+        """ Replace the pending work with the assets of some minigames
+
+        :param registry: MinigameRegistry used to look up the minigame names
+        :param minigames: sequence of (minigame name, keyword args) in the order they are likely to run
+        """
+        self._planned = list(minigames)
+        self._replace(registry, self._planned)
+
+    def prefetch_first(self, registry, minigames):
+        """ Like prefetch, but keep the minigames of the last prefetch call queued after these
+
+        For minigames that may be launched before the planned ones, like
+        the ones next to where the player is standing.  Every call still
+        replaces the minigames of the call before it.
+        """
+        self._replace(registry, list(minigames) + self._planned)
+
+    def _replace(self, registry, minigames):
+        self.cancel()
+        self.start()
+        generation = self.generation
+        for name, kwargs in minigames:
+            minigame = registry.registry.get(name)
+            if minigame is None:
+                continue
+            try:
+                self._queue.put_nowait((generation, minigame, kwargs or {}))
+            except queue.Full:
+                break
+
+    def _run(self):
+        while True:
+            generation, minigame, kwargs = self._queue.get()
+            if minigame is None:
+                return
+            if generation != self.generation:
+                continue
+
+            try:
+                assets = minigame.get_assets(**kwargs)
+            except Exception:
+                logger.exception("Could not list the assets of %s", minigame.GAME_NAME)
+                continue
+
+            for asset in assets:
+                # the player went somewhere else, stop loading for the old path
+                if generation != self.generation:
+                    break
+                try:
+                    self.cache.warm(*asset)
+                except Exception:
+                    logger.exception("Could not prefetch %s", asset)
+
+
+def activation_minigames(activation):
+    """ Yield (minigame name, keyword args) for everything an activation can launch """
+    if not activation or activation.get("command") != "launch-mini-game":
+        return
+
+    keyword_args = activation.get("activation-keyword-args", {})
+    yield keyword_args["mini-game-name"], keyword_args.get("mini-game-keyword-args")
+    for post_run_action in keyword_args.get("post-run-actions", []):
+        if post_run_action.get("action") == "run-mini-game" and "mini-game-name" in post_run_action:
+            yield post_run_action["mini-game-name"], post_run_action.get("mini-game-keyword-args")
+
+
+def prefetch_neighbours(registry, vertex):
+    """ Prefetch the minigames that can be launched from a vertex or the vertices next to it """
+    vertices = [vertex] + [edge.to_vertex for edge in vertex.edges]
+    minigames = [i for v in vertices for i in activation_minigames(v.activation)]
+    # the graph can be left before any of these are launched, so keep the steps after it queued too
+    prefetcher.prefetch_first(registry, minigames)
+
+
+prefetcher = Prefetcher()
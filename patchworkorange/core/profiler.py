@@ -0,0 +1,204 @@
+"""
+Measure where frame time goes
+
+Code that might be slow is wrapped in a named scope:
+
+    with profiler.scope("draw"):
+        self.draw(screen)
+
+Every frame ends in headless.flip or headless.update, which adds the
+time since the previous frame as the "frame" scope.  A sample is the
+time spent in a scope during one frame, and the last WINDOW samples of
+every scope are kept per minigame, for percentiles.  Scopes timed on
+other threads, like the prefetcher loading assets, are kept apart under
+"scope@thread" with a sample per call, as they don't hold up the frame.
+
+Nothing is measured until the profiler is enabled.  When it is, F3 shows
+and hides an overlay with the percentiles of the current minigame, and
+with a log file every frame is written as a JSON line.
+"""
+import json
+import threading
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+
+import pygame
+
+
+class _Scope(object):
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.profiler.add(self.name, (perf_counter() - self.start) * 1000)
+
+
+class _NullScope(object):
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_null_scope = _NullScope()
+
+
+def percentile(ordered, percent):
+    """ Nearest rank percentile of a sorted list """
+    return ordered[int(round(percent / 100.0 * (len(ordered) - 1)))]
+
+
+class Profiler(object):
+    WINDOW = 240  # samples kept per scope, 4 seconds at 60 fps
+    PERCENTILES = (50, 95, 99)
+    OVERLAY_KEY = pygame.K_F3
+    OVERLAY_REFRESH = 30  # frames between redraws of the overlay text
+    OVERLAY_COLOR = (255, 255, 0)
+    OVERLAY_BACKGROUND = (0, 0, 0)
+
+    def __init__(self):
+        self.enabled = False
+        self.overlay_visible = False
+        self.frames = 0
+        self._minigames = ["main"]
+        self._samples = dict()  # (minigame, scope) -> deque of ms
+        self._frame = dict()  # scope -> ms spent in this frame
+        self._last_frame = None
+        self._log = None
+        self._font = None
+        self._overlay = None
+        self._overlay_key_down = False
+        self._main_thread = threading.main_thread()
+
+    def enable(self, log_path=None, overlay=False):
+        self.enabled = True
+        self.overlay_visible = overlay
+        if log_path is not None:
+            self._log = open(log_path, "w")
+
+    def reset(self):
+        """ Forget all samples """
+        self._samples = dict()
+        self._frame = dict()
+        self._last_frame = None
+
+    def close(self):
+        self.enabled = False
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    @property
+    def minigame(self):
+        return self._minigames[-1]
+
+    @contextmanager
+    def minigame_scope(self, name):
+        """ Keep the samples taken in the with block apart under this minigame """
+        self._minigames.append(name)
+        self._last_frame = None
+        self._frame = dict()
+        try:
+            yield
+        finally:
+            self._minigames.pop()
+            self._last_frame = None
+            self._frame = dict()
+
+    def scope(self, name):
+        if not self.enabled:
+            return _null_scope
+        return _Scope(self, name)
+
+    def add(self, name, ms):
+        if threading.current_thread() is self._main_thread:
+            self._frame[name] = self._frame.get(name, 0.0) + ms
+        else:
+            self.add_sample("%s@%s" % (name, threading.current_thread().name), ms)
+
+    def add_sample(self, name, ms):
+        key = self.minigame, name
+        try:
+            samples = self._samples[key]
+        except KeyError:
+            samples = self._samples[key] = deque(maxlen=self.WINDOW)
+        samples.append(ms)
+
+    def end_frame(self):
+        """ Called by headless when a frame is shown """
+        if not self.enabled:
+            return
+
+        now = perf_counter()
+        if self._last_frame is not None:
+            ms = (now - self._last_frame) * 1000
+            self.add_sample("frame", ms)
+            for name, scope_ms in self._frame.items():
+                self.add_sample(name, scope_ms)
+            if self._log is not None:
+                record = {"minigame": self.minigame, "frame": self.frames, "ms": round(ms, 3),
+                          "scopes": {k: round(v, 3) for k, v in self._frame.items()}}
+                self._log.write(json.dumps(record) + "\n")
+        self._last_frame = now
+        self._frame = dict()
+        self.frames += 1
+
+    def get_percentiles(self, name, minigame=None):
+        """ Return {percentile: ms} of the samples of a scope, or None if there are none """
+        samples = self._samples.get((minigame or self.minigame, name))
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return {p: percentile(ordered, p) for p in self.PERCENTILES}
+
+    def get_scope_names(self, minigame=None):
+        minigame = minigame or self.minigame
+        return sorted(name for game, name in list(self._samples) if game == minigame)
+
+    def draw_overlay(self, surface):
+        """ Draw the overlay if it is visible and return the area drawn, or None """
+        if not self.enabled:
+            return None
+
+        key_down = bool(pygame.key.get_pressed()[self.OVERLAY_KEY])
+        if key_down and not self._overlay_key_down:
+            self.overlay_visible = not self.overlay_visible
+            self._overlay = None
+        self._overlay_key_down = key_down
+
+        if not self.overlay_visible:
+            return None
+        if self._overlay is None or self.frames % self.OVERLAY_REFRESH == 0:
+            self._overlay = self.render_overlay()
+        return surface.blit(self._overlay, (0, 0))
+
+    def render_overlay(self):
+        if self._font is None:
+            self._font = pygame.font.SysFont("monospace", 14, bold=True)
+
+        header = "%-16s" % self.minigame + "".join("%8s" % ("p%d" % p) for p in self.PERCENTILES)
+        lines = [header]
+        for name in self.get_scope_names():
+            values = self.get_percentiles(name)
+            lines.append("%-16s" % name[:16] + "".join("%8.2f" % values[p] for p in self.PERCENTILES))
+
+        labels = [self._font.render(line, 0, self.OVERLAY_COLOR, self.OVERLAY_BACKGROUND) for line in lines]
+        height = self._font.get_linesize()
+        width = max(label.get_width() for label in labels)
+        overlay = pygame.Surface((width + 8, height * len(labels) + 8))
+        overlay.fill(self.OVERLAY_BACKGROUND)
+        for index, label in enumerate(labels):
+            overlay.blit(label, (4, 4 + index * height))
+        return overlay
+
+
+profiler = Profiler()
@@ -0,0 +1,293 @@
+"""
+Record the input of a play session and play it back
+
+A recording has everything the game gets from the outside world: the
+events returned by pygame.event.get, the keyboard state and the time
+passed to every Clock.tick.  The keyboard state is kept as the keycodes
+held down, followed through the KEYDOWN and KEYUP events, because that
+is how the game looks keys up in pygame.key.get_pressed.  It also has the seed of the random numbers.
+Played back, the game makes the same calls in the same order and gets
+the same answers, so it plays out the same way.  Clocks don't wait while
+playing back, so the game runs as fast as it can be drawn.
+
+Recordings are JSON lines, gzipped if the file name ends with .gz.  The
+first line is a header, every other line a call.  Identical calls in a
+row are stored once with a repeat count.
+
+    python -m patchworkorange --record session.jsonl.gz --minigame FirewallBreaker
+    python -m patchworkorange --replay session.jsonl.gz
+
+Timers set with pygame.time.set_timer are not started when playing back,
+their events are in the recording.
+"""
+import gzip
+import json
+import random
+import threading
+import time
+from logging import getLogger
+
+import pygame
+
+from patchworkorange.core import loop
+
+logger = getLogger(__name__)
+
+VERSION = 2
+
+
+class ReplayException(Exception):
+    pass
+
+
+class ReplayFinishedException(ReplayException):
+    pass
+
+
+class ReplayDesyncException(ReplayException):
+    pass
+
+
+def open_recording(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t")
+    return open(path, mode)
+
+
+def encode_event(event):
+    return [event.type, event.dict]
+
+
+def decode_event(data):
+    event_type, attributes = data
+    attributes = {k: tuple(v) if isinstance(v, list) else v for k, v in attributes.items()}
+    return pygame.event.Event(event_type, attributes)
+
+
+class KeyState(object):
+    """ Stands in for what pygame.key.get_pressed returns, indexed by keycode
+
+    Keys that aren't down are 0.  Iterating gives a 1 for every key that
+    is down, so checks like any(pressed) work the same as with pygame.
+    """
+    __slots__ = ('keys',)
+
+    def __init__(self, keys=()):
+        self.keys = frozenset(keys)
+
+    def __getitem__(self, key):
+        return 1 if key in self.keys else 0
+
+    def __iter__(self):
+        return iter([1] * len(self.keys))
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class Session(object):
+    """ Replaces pygame functions while recording or playing back
+
+    Use as a context manager, or call start and stop.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.seed = None
+        self.ticks = 0
+        self._file = None
+        self._patched = list()
+
+    def patch(self, obj, name, value):
+        self._patched.append((obj, name, getattr(obj, name)))
+        setattr(obj, name, value)
+
+    def start(self):
+        random.seed(self.seed)
+        loop.set_seed(self.seed)
+
+    def stop(self):
+        while self._patched:
+            obj, name, value = self._patched.pop()
+            setattr(obj, name, value)
+        loop.set_seed(None)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class Recorder(Session):
+    """ Record a session
+
+    Keyword arguments are saved in the header, main uses them to remember
+    which minigame was played.
+    """
+
+    def __init__(self, path, seed=None, **info):
+        super(Recorder, self).__init__(path)
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.info = info
+        self._keys = set()
+        self._pressed = KeyState()
+        self._last = None
+        self._repeat = 0
+
+    def start(self):
+        super(Recorder, self).start()
+        # keys already down when recording starts are never seen going down
+        header = dict(self.info, version=VERSION, seed=self.seed, keys=[])
+        self._file = open_recording(self.path, "w")
+        self._file.write(json.dumps(header) + "\n")
+
+        real_get, real_clock = pygame.event.get, pygame.time.Clock
+        self.patch(pygame.event, "get", lambda *args, **kwargs: self.get_events(real_get(*args, **kwargs)))
+        # the game sees the same keyboard state now as when the recording is played back
+        self.patch(pygame.key, "get_pressed", lambda: self._pressed)
+        self.patch(pygame.time, "Clock", lambda: _RecordingClock(self, real_clock()))
+        logger.info("recording to %s with seed %d", self.path, self.seed)
+
+    def stop(self):
+        if self._file is not None:
+            self.flush()
+            logger.info("recorded %d ticks", self.ticks)
+        super(Recorder, self).stop()
+
+    def write(self, record):
+        if record == self._last:
+            self._repeat += 1
+        else:
+            self.flush()
+            self._last = record
+            self._repeat = 1
+
+    def flush(self):
+        if self._last is not None:
+            record = dict(self._last, repeat=self._repeat) if self._repeat > 1 else self._last
+            self._file.write(json.dumps(record) + "\n")
+            self._last = None
+
+    def get_events(self, events):
+        # the keyboard state only changes when events are pumped
+        record = {"events": [encode_event(event) for event in events]}
+        keys = set(self._keys)
+        for event in events:
+            if event.type == pygame.KEYDOWN:
+                keys.add(event.key)
+            elif event.type == pygame.KEYUP:
+                keys.discard(event.key)
+        if keys != self._keys:
+            self._keys = keys
+            self._pressed = KeyState(keys)
+            record["keys"] = sorted(keys)
+        self.write(record)
+        return events
+
+    def tick(self, ms):
+        self.ticks += 1
+        self.write({"tick": ms})
+
+
+class Player(Session):
+    """ Play back a recording
+
+    ReplayFinishedException is raised when the game asks for more than
+    was recorded, and ReplayDesyncException when it asks for something
+    else than what was recorded.  Either can happen when the game code
+    changed since the recording was made.
+    """
+
+    def __init__(self, path):
+        super(Player, self).__init__(path)
+        self._file = open_recording(path, "r")
+        self.info = json.loads(self._file.readline())
+        if self.info.get("version") != VERSION:
+            raise ReplayException("%s: unsupported version %s" % (path, self.info.get("version")))
+        self.seed = self.info["seed"]
+        self._pressed = KeyState(self.info["keys"])
+        self._record = None
+        self._remaining = 0
+        self._thread = None
+
+    def start(self):
+        super(Player, self).start()
+        self._thread = threading.current_thread()
+        real_sleep = time.sleep
+        self.patch(pygame.event, "get", lambda *args, **kwargs: self.get_events())
+        self.patch(pygame.key, "get_pressed", lambda: self._pressed)
+        self.patch(pygame.time, "Clock", lambda: _ReplayClock(self))
+        self.patch(pygame.time, "set_timer", lambda *args, **kwargs: None)
+        self.patch(time, "sleep", lambda seconds: None if threading.current_thread() is self._thread
+                   else real_sleep(seconds))
+        logger.info("playing back %s with seed %d", self.path, self.seed)
+
+    def stop(self):
+        if self._file is not None:
+            logger.info("played back %d ticks", self.ticks)
+        super(Player, self).stop()
+
+    def next_record(self, kind):
+        if not self._remaining:
+            line = self._file.readline()
+            if not line:
+                raise ReplayFinishedException("%s ended after %d ticks" % (self.path, self.ticks))
+            self._record = json.loads(line)
+            self._remaining = self._record.get("repeat", 1)
+
+        if kind not in self._record:
+            raise ReplayDesyncException("%s: game asked for \"%s\" after %d ticks, but got %s" %
+                                        (self.path, kind, self.ticks, self._record))
+        self._remaining -= 1
+        return self._record
+
+    def get_events(self):
+        record = self.next_record("events")
+        if "keys" in record:
+            self._pressed = KeyState(record["keys"])
+        return [decode_event(data) for data in record["events"]]
+
+    def tick(self):
+        ms = self.next_record("tick")["tick"]
+        self.ticks += 1
+        return ms
+
+
+class _RecordingClock(object):
+    def __init__(self, recorder, clock):
+        self._recorder = recorder
+        self._clock = clock
+
+    def tick(self, framerate=0):
+        ms = self._clock.tick(framerate)
+        self._recorder.tick(ms)
+        return ms
+
+    def __getattr__(self, name):
+        return getattr(self._clock, name)
+
+
+class _ReplayClock(object):
+    """ Clock that returns the recorded times without waiting """
+
+    def __init__(self, player):
+        self._player = player
+        self._time = 0
+
+    def tick(self, framerate=0):
+        self._time = self._player.tick()
+        return self._time
+
+    def get_time(self):
+        return self._time
+
+    def get_rawtime(self):
+        return self._time
+
+    def get_fps(self):
+        return 1000.0 / self._time if self._time else 0.0
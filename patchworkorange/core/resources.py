@@ -1,29 +1,346 @@
-from pkg_resources import resource_listdir, resource_filename
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from importlib import resources as importlib_resources
+from logging import getLogger
+
+import pygame
+
+from patchworkorange.core.profiler import profiler
+
+logger = getLogger(__name__)
+
+ASSETS_PACKAGE = 'patchworkorange.assets'
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets')
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+
+class MissingAssetException(Exception):
+    pass
+
+
+def build_manifest(root=ASSETS_DIR, with_hashes=True):
+    """ Walk the asset folders and describe every file in them
+
+    Paths are relative to the assets folder and always use forward slashes.
+    Hashing reads every file, so it is skipped when building a manifest
+    on the fly at runtime.
+    """
+    assets = dict()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d != '__pycache__')
+        for filename in sorted(filenames):
+            if filename == '__init__.py' or filename.endswith('.pyc'):
+                continue
+            path = os.path.join(dirpath, filename)
+            relpath = os.path.relpath(path, root).replace(os.sep, '/')
+            if relpath == MANIFEST_NAME:
+                continue
+            stat = os.stat(path)
+            assets[relpath] = {
+                'size': stat.st_size,
+                'mtime': int(stat.st_mtime),
+                'sha1': hash_file(path) if with_hashes else None,
+            }
+    return {'version': MANIFEST_VERSION, 'assets': assets}
+
+
+def hash_file(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as fob:
+        for chunk in iter(lambda: fob.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_manifest(root=ASSETS_DIR):
+    manifest = build_manifest(root)
+    with open(os.path.join(root, MANIFEST_NAME), 'w') as fob:
+        json.dump(manifest, fob, indent=1, sort_keys=True)
+    return manifest
+
+
+def load_manifest(root=ASSETS_DIR):
+    """ Read the generated manifest, or scan the asset folders without it """
+    try:
+        with open(os.path.join(root, MANIFEST_NAME)) as fob:
+            manifest = json.load(fob)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+        logger.warning("Asset manifest is out of date, scanning asset folders instead")
+    except FileNotFoundError:
+        logger.warning("No asset manifest found, scanning asset folders instead")
+    return build_manifest(root, with_hashes=False)
+
+
+def verify_manifest(check_hashes=False):
+    """ Check that every file listed in the manifest is on disk and unchanged
+
+    Meant to be called once at startup, where only the file sizes are
+    compared, so it only costs a stat call per asset.  With check_hashes
+    the contents are compared too, which reads every file.
+    """
+    problems = list()
+    for relpath, entry in get_manifest()['assets'].items():
+        path = os.path.join(ASSETS_DIR, relpath)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            problems.append("missing asset \"%s\"" % relpath)
+            continue
+        if size != entry['size']:
+            problems.append("asset \"%s\" changed since the manifest was generated" % relpath)
+        elif check_hashes and entry.get('sha1') and hash_file(path) != entry['sha1']:
+            problems.append("asset \"%s\" changed since the manifest was generated" % relpath)
+    return problems
+
+
+_manifest = None
+
+
+def get_manifest():
+    global _manifest
+    if _manifest is None:
+        _manifest = load_manifest()
+    return _manifest
+
+
+def list_assets(folder):
+    prefix = folder + '/'
+    return sorted(i[len(prefix):] for i in get_manifest()['assets'] if i.startswith(prefix))
+
+
+def resolve_asset(folder, name):
+    """ Return the filename of an asset
+
+    Names are looked up in the manifest first.  Anything not listed falls
+    back to importlib.resources, which also covers zipped installs.
+    """
+    relpath = folder + '/' + name.replace(os.sep, '/')
+    if relpath in get_manifest()['assets']:
+        return os.path.join(ASSETS_DIR, *relpath.split('/'))
+
+    path = importlib_resources.files(ASSETS_PACKAGE + '.' + folder).joinpath(*name.replace(os.sep, '/').split('/'))
+    if path.is_file():
+        logger.warning("Asset \"%s\" is not in the manifest", relpath)
+        return str(path)
+
+    raise MissingAssetException("Asset \"%s\" does not exist" % relpath)
+
+
+def get_cache_dir(name):
+    """ Return a folder for files generated at runtime, creating it if needed """
+    root = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    path = os.path.join(root, 'patchworkorange', name)
+    os.makedirs(path, exist_ok=True)
+    return path
 
 
 def list_maps():
-    print(resource_listdir('patchworkorange.assets.maps', ''))
+    print(list_assets('maps'))
 
 
 def list_data():
-    print(resource_listdir('patchworkorange.assets.data', ''))
+    print(list_assets('data'))
 
 
 def get_data_asset(name):
-    return resource_filename('patchworkorange.assets.data', name)
+    return resolve_asset('data', name)
 
 
 def get_map_asset(name):
-    return resource_filename('patchworkorange.assets.maps', name)
+    return resolve_asset('maps', name)
 
 
 def get_image_asset(name):
-    return resource_filename("patchworkorange.assets.images", name)
+    return resolve_asset('images', name)
 
 
 def get_font_asset(name):
-    return resource_filename("patchworkorange.assets.fonts", name)
+    return resolve_asset('fonts', name)
 
 
 def get_sound_asset(name):
-    return resource_filename("patchworkorange.assets.sounds", name)
+    return resolve_asset('sounds', name)
+
+
+class AssetCache:
+    """ Process-wide cache of decoded assets
+
+    Entries are keyed by (kind, name, params) and evicted least recently
+    used first once the estimated size of the cache exceeds the budget.
+    Cached objects are shared, so callers must copy (convert, scale, etc)
+    before modifying them.
+
+    Only images are decoded by warm, pygame can't create fonts or sounds
+    off the main thread.  Their files are read into memory instead and
+    decoded from there by the next get.
+    """
+    FILES = 64  # most files read ahead and waiting to be decoded
+
+    def __init__(self, budget=128 * 1024 * 1024):
+        self.budget = budget
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()
+        self._files = OrderedDict()  # key -> bytes read by warm
+        self._readers = {
+            'font': get_font_asset,
+            'sound': get_sound_asset,
+        }
+        self._loaders = {
+            'image': self._load_image,
+            'font': self._load_font,
+            'sysfont': self._load_sysfont,
+            'sound': self._load_sound,
+        }
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, kind, name, *params):
+        key = kind, name, params
+        with self._lock:
+            try:
+                value, size = self._entries[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value
+
+        return self._load(key)
+
+    def warm(self, kind, name, *params):
+        """ Load an asset ahead of time without touching the hit/miss counters
+
+        Safe to call from any thread.  Images are decoded, fonts and sounds
+        are only read and system fonts are skipped.
+        """
+        key = kind, name, params
+        with self._lock:
+            if key in self._entries or key in self._files:
+                return
+        if kind == 'image':
+            with self._lock:
+                self.prefetched += 1
+            self._load(key)
+        elif kind in self._readers:
+            with self._lock:
+                self.prefetched += 1
+            self._read(key)
+
+    def _read(self, key):
+        kind, name, params = key
+        with profiler.scope("read"):
+            with open(self._readers[kind](name), 'rb') as fp:
+                data = fp.read()
+        with self._lock:
+            self._files[key] = data
+            while len(self._files) > self.FILES:
+                self._files.popitem(last=False)
+
+    def _load(self, key):
+        # decode outside of the lock so a prefetching thread never stalls the game
+        kind, name, params = key
+        with self._lock:
+            data = self._files.pop(key, None)
+        with profiler.scope("load"):
+            if data is None:
+                value, size = self._loaders[kind](name, *params)
+            else:
+                value, size = self._loaders[kind](name, *params, data=data)
+        with self._lock:
+            if key in self._entries:  # another thread got here first
+                return self._entries[key][0]
+            self._entries[key] = value, size
+            self.size += size
+            self._evict()
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._files.clear()
+            self.size = 0
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'size': self.size,
+            'budget': self.budget,
+            'hits': self.hits,
+            'misses': self.misses,
+            'prefetched': self.prefetched,
+        }
+
+    def _evict(self):
+        # never evict the entry that was just added
+        while self.size > self.budget and len(self._entries) > 1:
+            key, (value, size) = self._entries.popitem(last=False)
+            self.size -= size
+            logger.debug("Evicted asset %s %s", key[0], key[1])
+
+    @staticmethod
+    def _load_image(name):
+        surface = pygame.image.load(get_image_asset(name))
+        w, h = surface.get_size()
+        return surface, w * h * surface.get_bytesize()
+
+    @staticmethod
+    def _load_font(name, size, data=None):
+        if data is not None:
+            return pygame.font.Font(io.BytesIO(data), size), len(data)
+        path = get_font_asset(name)
+        return pygame.font.Font(path, size), os.path.getsize(path)
+
+    @staticmethod
+    def _load_sysfont(name, size, bold=False, italic=False):
+        # system fonts live outside the package, so just guess the size
+        return pygame.font.SysFont(name, size, bold, italic), 64 * 1024
+
+    @staticmethod
+    def _load_sound(name, data=None):
+        if data is not None:
+            sound = pygame.mixer.Sound(file=io.BytesIO(data))
+        else:
+            sound = pygame.mixer.Sound(get_sound_asset(name))
+        frequency, fmt, channels = pygame.mixer.get_init()
+        size = int(sound.get_length() * frequency * channels * abs(fmt) // 8)
+        return sound, size
+
+
+asset_cache = AssetCache()
+
+
+def load_image(name):
+    return asset_cache.get('image', name)
+
+
+def load_font(name, size):
+    return asset_cache.get('font', name, size)
+
+
+def load_sys_font(name, size, bold=False, italic=False):
+    return asset_cache.get('sysfont', name, size, bold, italic)
+
+
+def load_sound(name):
+    return asset_cache.get('sound', name)
+
+
+if __name__ == '__main__':
+    # regenerate the manifest after adding, removing or changing assets
+    manifest = write_manifest()
+    print("Wrote %d assets to the manifest" % len(manifest['assets']))
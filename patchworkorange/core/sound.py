@@ -0,0 +1,112 @@
+"""
+Play sound effects on a pool of mixer channels
+
+The sounds a minigame declares in Minigame.get_assets are loaded before
+it starts and kept until the next minigame, so playing one never reads
+or decodes a file, even if the asset cache dropped it in the meantime.
+
+    sound_manager.play("shield.wav", priority=1)
+
+Every sound is played on a channel of its own.  When all of them are
+busy the sound with the lowest priority is stopped to make room, the
+oldest if there is more than one, unless everything playing is more
+important than the new sound, which is then not played.  pygame on its
+own just drops a sound when it runs out of channels.
+"""
+from itertools import count
+from logging import getLogger
+
+import pygame
+
+from patchworkorange.core.resources import load_sound
+
+logger = getLogger(__name__)
+
+
+class SoundManager(object):
+    CHANNELS = 16
+
+    def __init__(self, channels=None):
+        self.channel_count = channels or self.CHANNELS
+        self.stolen = 0
+        self.dropped = 0
+        self._sounds = dict()  # name -> Sound
+        self._channels = None
+        self._playing = dict()  # channel index -> (priority, order it was started in, sound)
+        self._order = count()
+
+    def get_channels(self):
+        """ The channel pool, or None if the mixer isn't running """
+        if not pygame.mixer.get_init():
+            self._channels = None
+            return None
+        if self._channels is None:
+            pygame.mixer.set_num_channels(self.channel_count)
+            self._channels = [pygame.mixer.Channel(i) for i in range(self.channel_count)]
+            self._playing = dict()
+        return self._channels
+
+    def preload(self, assets):
+        """ Load the sounds in a list of asset cache tuples and keep them, forgetting the ones loaded before """
+        if not pygame.mixer.get_init():
+            return
+        sounds = dict()
+        for kind, name, *params in assets:
+            if kind == 'sound':
+                sounds[name] = self._sounds[name] if name in self._sounds else load_sound(name)
+        self._sounds = sounds
+
+    def get(self, name):
+        try:
+            return self._sounds[name]
+        except KeyError:
+            logger.debug("Sound \"%s\" was not preloaded", name)
+            sound = self._sounds[name] = load_sound(name)
+            return sound
+
+    def play(self, name, priority=0, loops=0, maxtime=0, fade_ms=0):
+        """ Play a sound and return its channel, or None if it was not played """
+        channels = self.get_channels()
+        if channels is None:
+            return None
+
+        index = self.find_channel(priority)
+        if index is None:
+            self.dropped += 1
+            return None
+
+        channel = channels[index]
+        sound = self.get(name)
+        channel.play(sound, loops, maxtime, fade_ms)
+        self._playing[index] = priority, next(self._order), sound
+        return channel
+
+    def find_channel(self, priority):
+        """ Index of a free channel, or of the one to steal for a sound of this priority, or None """
+        busy = list()
+        for index, channel in enumerate(self._channels):
+            if not channel.get_busy():
+                self._playing.pop(index, None)
+                return index
+
+            # channels can be busy with sounds that weren't played here, those count as the oldest of priority 0
+            entry = self._playing.get(index)
+            if entry is None or channel.get_sound() is not entry[2]:
+                self._playing.pop(index, None)
+                entry = 0, -1, None
+            busy.append((entry[0], entry[1], index))
+
+        lowest_priority, order, index = min(busy)
+        if lowest_priority > priority:
+            return None
+        self._channels[index].stop()
+        self.stolen += 1
+        return index
+
+    def stop(self):
+        if self._channels is not None:
+            for channel in self._channels:
+                channel.stop()
+
+
+sound_manager = SoundManager()
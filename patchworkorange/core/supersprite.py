@@ -1,3 +1,5 @@
+from collections import OrderedDict
+
 import pygame
 from animation import animation
 from pygame.transform import scale, rotozoom
@@ -5,9 +7,70 @@ from pygame.transform import scale, rotozoom
 from patchworkorange.core.ui import surface_clipping_context
 
 
+class TransformCache:
+    """ Scaled and rotated copies of images, shared by all SuperSprites
+
+    Entries are keyed by (image, size, angle) and evicted least recently
+    used first once they take more memory than the budget.
+    """
+
+    def __init__(self, budget=32 * 1024 * 1024):
+        self.budget = budget
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, image, size, angle):
+        """ Return image scaled to size, if not None, then rotated by angle """
+        key = image, size, angle
+        try:
+            transformed = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            transformed = self.transform(image, size, angle)
+            self._entries[key] = transformed
+            self.size += self.get_byte_size(transformed)
+            self._evict()
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return transformed
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def _evict(self):
+        # never evict the entry that was just added
+        while self.size > self.budget and len(self._entries) > 1:
+            key, transformed = self._entries.popitem(last=False)
+            self.size -= self.get_byte_size(transformed)
+
+    @staticmethod
+    def get_byte_size(image):
+        w, h = image.get_size()
+        return w * h * image.get_bytesize()
+
+    @staticmethod
+    def transform(image, size, angle):
+        if size is not None:
+            image = scale(image, size)
+        if angle:
+            image = rotozoom(image, angle, 1)
+        return image
+
+
+transform_cache = TransformCache()
+
+
 class SuperSprite(pygame.sprite.DirtySprite):
     dirty = False
 
+    # rotation and size are rounded to these steps, so fewer transformed images are needed
+    ANGLE_STEP = 1
+    SIZE_STEP = 1
+
     def __init__(self, *args, **kwargs):
         self.rect = None  # type: pygame.Rect
         super(SuperSprite, self).__init__(*args)
@@ -62,18 +125,16 @@ class SuperSprite(pygame.sprite.DirtySprite):
         self._needs_update = True
 
     def update_image(self):
-        if self._needs_rescale:
-            w = self.rect.width if self._width is None else self._width
-            h = self.rect.height if self._height is None else self._height
-            image = scale(self._original_image, (w, h))
+        size = self._get_scaled_size()
+        if size is not None:
             center = self.rect.center
-            self.rect.size = w, h
+            self.rect.size = size
             self.rect.center = center
-        else:
-            image = self._original_image
 
-        if self._rotation:
-            image = rotozoom(image, self._rotation, 1)
+        angle = self.quantize_angle(self._rotation)
+        image = transform_cache.get(self._original_image, size, angle)
+
+        if angle:
             rect = image.get_rect(center=self.rect.center)
             self.rect.size = rect.size
             self.rect.center = rect.center
@@ -81,6 +142,21 @@ class SuperSprite(pygame.sprite.DirtySprite):
         self._width, self._height = self.rect.size
         self._image = image
 
+    def _get_scaled_size(self):
+        if not self._needs_rescale:
+            return None
+        w = self.rect.width if self._width is None else self._width
+        h = self.rect.height if self._height is None else self._height
+        return self.quantize_size(w, h)
+
+    def quantize_angle(self, angle):
+        step = self.ANGLE_STEP
+        return int(round(angle / step) * step) % 360
+
+    def quantize_size(self, w, h):
+        step = self.SIZE_STEP
+        return max(int(round(w / step) * step), 1), max(int(round(h / step) * step), 1)
+
     @property
     def rotation(self):
         return self._rotation
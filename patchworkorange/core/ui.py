@@ -1,3 +1,5 @@
+import weakref
+from collections import OrderedDict
 from contextlib import contextmanager
 from itertools import product
 
@@ -61,6 +63,21 @@ class PyscrollGroup(pygame.sprite.LayeredUpdates):
 
 
 class GraphicBox:
+    """ Nine-slice box drawn from a border image
+
+    Finished boxes are cached per border, fill mode and size, so drawing
+    a box that was drawn before is a single blit.  While a box is being
+    animated pass nearest=True to draw; the size is then rounded to a
+    step of SIZE_STEP pixels so an animation only bakes a handful of
+    boxes instead of one per frame.
+    """
+    SIZE_STEP = 32
+
+    # (border, color, fill tiles, size) -> surface, shared by all boxes
+    _boxes = OrderedDict()
+    _boxes_pixels = 0
+    max_pixels = 4 * 1024 * 1024
+
     def __init__(self, border=None, background=None, color=None, fill_tiles=False):
         super(GraphicBox, self).__init__()
         self._background = background
@@ -69,6 +86,7 @@ class GraphicBox:
         self._tiles = list()
         self._tile_size = 0, 0
         self._rect = None
+        self._border = border
         if border:
             self._set_border(border)
 
@@ -79,7 +97,42 @@ class GraphicBox:
         self._tiles = [surface.subsurface((x, y, tw, th))
                        for x, y in product(range(0, iw, tw), range(0, ih, th))]
 
-    def draw(self, surface, rect):
+    def draw(self, surface, rect, nearest=False):
+        """ Draw the box in rect
+
+        :param nearest: draw the closest box in a small set of sizes, centered on rect
+        :return: area of the surface that was modified
+        """
+        rect = pygame.Rect(rect)
+        if nearest:
+            tw, th = self._tile_size
+            step = self.SIZE_STEP
+            size = (max(int(round(rect.width / step)) * step, tw * 2),
+                    max(int(round(rect.height / step)) * step, th * 2))
+            rect = pygame.Rect((0, 0), size, center=rect.center)
+        return surface.blit(self.get_box(rect.size), rect)
+
+    def get_box(self, size):
+        """ Return a surface with the finished box of some size """
+        cls = GraphicBox
+        key = self._border, tuple(self._color) if self._color else None, self._fill_tiles, tuple(size)
+        try:
+            box = cls._boxes[key]
+        except KeyError:
+            box = pygame.Surface(size, pygame.SRCALPHA)
+            self.draw_tiles(box, box.get_rect())
+            cls._boxes[key] = box
+            cls._boxes_pixels += size[0] * size[1]
+            # never evict the box that was just added
+            while cls._boxes_pixels > cls.max_pixels and len(cls._boxes) > 1:
+                old_key, old_box = cls._boxes.popitem(last=False)
+                cls._boxes_pixels -= old_box.get_width() * old_box.get_height()
+        else:
+            cls._boxes.move_to_end(key)
+        return box
+
+    def draw_tiles(self, surface, rect):
+        """ Draw the box tile by tile """
         inner = self.calc_inner_rect(rect)
 
         # fill center with solid _color
@@ -132,6 +185,234 @@ class GraphicBox:
             return rect
 
 
+LINE_SPACING = -2
+
+
+class FontCache:
+    """ Measurements and rendered lines of one font
+
+    Advance widths are cached per character so lines can be measured
+    without asking the font about the same characters over and over.
+    They are only used to guess where lines break, as they leave out
+    kerning.  Lines are rendered whole, like font.render does, and kept
+    per text and colors, least recently used first out.
+    """
+    MAX_LINES = 256
+
+    def __init__(self, font):
+        self.font = font
+        self.height = font.size("Tg")[1]
+        self._advances = dict()
+        self._lines = OrderedDict()
+
+    def clear(self):
+        self._lines.clear()
+
+    def advance(self, char):
+        try:
+            return self._advances[char]
+        except KeyError:
+            metrics = self.font.metrics(char)
+            if metrics and metrics[0] is not None:
+                advance = metrics[0][4]
+            else:
+                advance = self.font.size(char)[0]
+            self._advances[char] = advance
+            return advance
+
+    def line(self, text, aa, fg_color, bg_color):
+        key = text, bool(aa), tuple(fg_color), None if bg_color is None else tuple(bg_color)
+        try:
+            image = self._lines[key]
+        except KeyError:
+            if bg_color:
+                image = self.font.render(text, aa, fg_color, bg_color)
+                image.set_colorkey(bg_color)
+            else:
+                image = self.font.render(text, aa, fg_color)
+            self._lines[key] = image
+            if len(self._lines) > self.MAX_LINES:
+                self._lines.popitem(last=False)
+        else:
+            self._lines.move_to_end(key)
+        return image
+
+    def estimate_overflow(self, text, width):
+        """ Guess the first k where text[:k] is at least width wide, or len(text) + 1 """
+        advance = self.advance
+        x = 0
+        for index, char in enumerate(text):
+            x += advance(char)
+            if x >= width:
+                return index + 1
+        return len(text) + 1
+
+    def render(self, surface, text, position, aa, fg_color, bg_color):
+        """ Draw a line of text and return the area that was drawn """
+        return surface.blit(self.line(text, aa, fg_color, bg_color), position)
+
+
+_font_caches = weakref.WeakKeyDictionary()
+
+
+def get_font_cache(font):
+    try:
+        return _font_caches[font]
+    except KeyError:
+        font_cache = FontCache(font)
+        _font_caches[font] = font_cache
+        return font_cache
+
+
+def find_overflow(text, width, font, font_cache):
+    """ Return the first k where font.size(text[:k]) is at least width, or None if all the text fits
+
+    The advance widths give a guess that is then checked against the
+    font, so only a couple of prefixes near the end of the line are
+    measured.  Prefix widths only grow, so this is the same k the
+    character by character scan used to find.
+    """
+    size = font.size
+    limit = len(text)
+    k = min(max(font_cache.estimate_overflow(text, width), 1), limit + 1)
+    while k > 1 and size(text[:k - 1])[0] >= width:
+        k -= 1
+    while k <= limit and size(text[:k])[0] < width:
+        k += 1
+    return k if k <= limit else None
+
+
+def break_line(text, width, font, font_cache):
+    """ Find where the next line of text ends
+
+    Same rules as the old scan in draw_text: lines end at a newline, or
+    after the last space before the first character that doesn't fit.
+    A newline that ends a line is removed from the text.
+
+    :return: (characters in the line, widest prefix measured, text)
+    """
+    overflow = find_overflow(text, width, font, font_cache)
+    newline = text.find("\n", 1, len(text) if overflow is None else overflow)
+    if newline != -1:
+        measured = font.size(text[:newline])[0] if newline > 1 else 0
+        return newline, measured, text[:newline] + text[newline + 1:]
+
+    end = len(text) if overflow is None else overflow
+    measured = font.size(text[:end])[0] if end > 1 else 0
+    if end < len(text):
+        end = text.rfind(" ", 0, end) + 1
+    return end, measured, text
+
+
+def layout_text(text, rect, font):
+    """ Break text into lines that fit in rect
+
+    :return: (list of (line, y), width of the widest line, text that didn't fit)
+    """
+    rect = pygame.Rect(rect)
+    font_cache = get_font_cache(font)
+    lines = list()
+    total_width = 0
+    y = rect.top
+
+    while text:
+        # determine if the row of text will be outside our area
+        if y + font_cache.height > rect.bottom:
+            break
+
+        char_index, line_width, text = break_line(text, rect.width, font, font_cache)
+        total_width = max(total_width, line_width)
+        lines.append((text[:char_index], y))
+        y += font_cache.height + LINE_SPACING
+
+        # remove the text we just laid out
+        text = text[char_index:]
+
+    return lines, total_width, text
+
+
+class TextCache:
+    """ Remember laid out and rendered paragraphs of text
+
+    Layouts only depend on the text, font and size of the area, so
+    measuring (drawing to None) and drawing the same text share one.
+    Rendered paragraphs also depend on the colors and antialiasing, and
+    are evicted least recently used first once they hold more pixels
+    than the budget.  Only text with a background color is rendered into
+    paragraphs, because it can be colorkeyed and blitted in one go
+    without changing how it looks.
+    """
+
+    def __init__(self, max_layouts=512, max_pixels=2 * 1024 * 1024):
+        self.max_layouts = max_layouts
+        self.max_pixels = max_pixels
+        self.pixels = 0
+        self.hits = 0
+        self.misses = 0
+        self._layouts = OrderedDict()
+        self._paragraphs = OrderedDict()
+
+    def clear(self):
+        self._layouts.clear()
+        self._paragraphs.clear()
+        self.pixels = 0
+
+    def get_layout(self, text, font, size):
+        """ Return layout_text for an area of size at (0, 0) """
+        key = text, font, tuple(size)
+        try:
+            layout = self._layouts[key]
+        except KeyError:
+            self.misses += 1
+            layout = layout_text(text, pygame.Rect((0, 0), size), font)
+            self._layouts[key] = layout
+            if len(self._layouts) > self.max_layouts:
+                self._layouts.popitem(last=False)
+        else:
+            self.hits += 1
+            self._layouts.move_to_end(key)
+        return layout
+
+    def get_paragraph(self, text, font, size, fg_color, bg_color, aa):
+        """ Return a colorkeyed surface with the text drawn like draw_text would """
+        key = text, font, tuple(size), tuple(fg_color), tuple(bg_color), bool(aa)
+        try:
+            surface = self._paragraphs[key]
+        except KeyError:
+            self.misses += 1
+            surface = self._render_paragraph(text, font, size, fg_color, bg_color, aa)
+            self._paragraphs[key] = surface
+            self.pixels += surface.get_width() * surface.get_height()
+            self._evict()
+        else:
+            self.hits += 1
+            self._paragraphs.move_to_end(key)
+        return surface
+
+    def _render_paragraph(self, text, font, size, fg_color, bg_color, aa):
+        font_cache = get_font_cache(font)
+        lines = self.get_layout(text, font, size)[0]
+
+        # a line may stick out of the area, like it would when drawn directly
+        images = [(font_cache.line(line, aa, fg_color, bg_color), y) for line, y in lines]
+        width = max([size[0]] + [image.get_width() for image, y in images])
+        surface = pygame.Surface((width, size[1]))
+        surface.fill(bg_color)
+        surface.set_colorkey(bg_color)
+        for image, y in images:
+            surface.blit(image, (0, y))
+        return surface
+
+    def _evict(self):
+        # never evict the paragraph that was just added
+        while self.pixels > self.max_pixels and len(self._paragraphs) > 1:
+            key, surface = self._paragraphs.popitem(last=False)
+            self.pixels -= surface.get_width() * surface.get_height()
+
+
+text_cache = TextCache()
+
+
 def draw_text(surface, text, rect, font=None, fg_color=None, bg_color=None, aa=False):
     """ draw some text into an area of a surface
     automatically wraps words
@@ -141,58 +422,27 @@ def draw_text(surface, text, rect, font=None, fg_color=None, bg_color=None, aa=F
     if fg_color is None:
         fg_color = (0, 0, 0)
 
-    total_width = 0
     rect = pygame.Rect(rect)
-    y = rect.top
-    line_spacing = -2
 
     if font is None:
         full_path = pygame.font.get_default_font()
         font = pygame.font.Font(full_path, 16)
 
-    # get the height of the font
-    font_height = font.size("Tg")[1]
+    font_cache = get_font_cache(font)
 
     # for very small fonts, turn off antialiasing
-    if font_height < 16:
+    if font_cache.height < 16:
         aa = 0
         bg_color = None
 
-    while text:
-        char_index = 1
-
-        # determine if the row of text will be outside our area
-        if y + font_height > rect.bottom:
-            break
+    lines, total_width, leftover_text = text_cache.get_layout(text, font, rect.size)
 
-        # determine maximum width of line
-        line_width = font.size(text[:char_index])[0]
-        while line_width < rect.width and char_index < len(text):
-            if text[char_index] == "\n":
-                text = text[:char_index] + text[char_index + 1:]
-                break
-
-            char_index += 1
-            line_width = font.size(text[:char_index])[0]
-            total_width = max(total_width, line_width)
+    if surface:
+        if bg_color:
+            paragraph = text_cache.get_paragraph(text, font, rect.size, fg_color, bg_color, aa)
+            surface.blit(paragraph, rect.topleft)
         else:
-            # if we've wrapped the text, then adjust the wrap to the last word
-            if char_index < len(text):
-                char_index = text.rfind(" ", 0, char_index) + 1
-
-        if surface:
-            # render the line and blit it to the surface
-            if bg_color:
-                image = font.render(text[:char_index], aa, fg_color, bg_color)
-                image.set_colorkey(bg_color)
-            else:
-                image = font.render(text[:char_index], aa, fg_color)
-
-            surface.blit(image, (rect.left, y))
-
-        y += font_height + line_spacing
-
-        # remove the text we just blitted
-        text = text[char_index:]
+            for line, y in lines:
+                font_cache.render(surface, line, (rect.left, rect.top + y), aa, fg_color, bg_color)
 
-    return total_width, text
+    return total_width, leftover_text
@@ -0,0 +1,319 @@
+"""
+Check the adventure graphs and cutscenes under assets/data without playing them
+
+Every file is loaded in parallel and every problem found is reported in
+one pass, instead of the first one blowing up a few minutes into a game.
+Run it after changing any content:
+
+    python -m patchworkorange.core.validator
+
+Graph files are recognised by their START vertex and cutscene files by
+their scripts.  References to minigames are checked against the
+MinigameRegistry, references to cutscenes against the scene names found
+in the cutscene files and references to images and sounds against the
+asset manifest.  So are the assets minigames declare and the literal
+names the code passes to the asset loaders, and the assets themselves
+are hashed and compared with the manifest.
+"""
+import ast
+import inspect
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+
+from patchworkorange.core import resources
+from patchworkorange.core.adventuregraph import load_yaml_data, VALID_VERTEX_ID_RE, find_reachable_vertex_ids
+from patchworkorange.core.game import Game
+from patchworkorange.core.minigamemanager import MinigameRegistry, SetContextValueAction, RunMinigameAction
+from patchworkorange.minigames.cutscene.Cutscene import ScriptRunner, dialog_events
+from patchworkorange.minigames.graphview.behaviors import RunMinigameActivation
+
+logger = getLogger(__name__)
+
+# "none" marks vertices that deliberately do nothing when activated
+ACTIVATION_COMMANDS = ("launch-mini-game", "none")
+CUTSCENE_IMAGE_KEYS = ("background", "portrait", "border")
+CUTSCENE_SOUND_KEYS = ("music", "sound")
+DIALOG_EVENTS = {event[0] for event in dialog_events}
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# asset cache kinds and asset loading functions -> folder under assets
+ASSET_KIND_FOLDERS = {"image": "images", "sound": "sounds", "font": "fonts"}
+ASSET_FUNCTION_FOLDERS = {
+    "load_image": "images",
+    "load_sound": "sounds",
+    "load_font": "fonts",
+    "get_image_asset": "images",
+    "get_sound_asset": "sounds",
+    "get_font_asset": "fonts",
+    "get_map_asset": "maps",
+    "get_data_asset": "data",
+    "sound_manager.play": "sounds",
+}
+
+
+def asset_exists(folder, name):
+    return "%s/%s" % (folder, name) in resources.get_manifest()['assets']
+
+
+def find_code_asset_references(root=PACKAGE_DIR):
+    """ Yield (file, line, folder, name) for every literal asset name passed to an asset loading function """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in ("__pycache__", "assets"))
+        for filename in sorted(filenames):
+            if not filename.endswith(".py"):
+                continue
+            path = os.path.join(dirpath, filename)
+            with open(path, "rb") as fob:
+                tree = ast.parse(fob.read(), path)
+            relpath = os.path.relpath(path, root).replace(os.sep, "/")
+            for node in ast.walk(tree):
+                if not isinstance(node, ast.Call) or not node.args:
+                    continue
+                func = node.func
+                if isinstance(func, ast.Attribute):
+                    name = func.attr
+                    if isinstance(func.value, ast.Name) and func.value.id + "." + name in ASSET_FUNCTION_FOLDERS:
+                        name = func.value.id + "." + name
+                else:
+                    name = getattr(func, "id", None)
+                arg = node.args[0]
+                if name in ASSET_FUNCTION_FOLDERS and isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                    yield relpath, node.lineno, ASSET_FUNCTION_FOLDERS[name], arg.value
+
+
+def load_data_files(names, workers=None):
+    """ Load YAML files from assets/data in parallel
+
+    :return: dict of file name -> data, or the exception raised while loading it
+    """
+    def load(name):
+        try:
+            return load_yaml_data(resources.get_data_asset(name))
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(workers) as executor:
+        return dict(zip(names, executor.map(load, names)))
+
+
+def is_graph_data(data):
+    return isinstance(data, dict) and ("START" in data or "GLOBAL" in data)
+
+
+def is_cutscene_data(data):
+    return isinstance(data, dict) and bool(data) and all(isinstance(i, dict) and "script" in i for i in data.values())
+
+
+class Validator:
+    """ Collect the problems found in the data files
+
+    Problems are plain strings prefixed with the file they were found in.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.problems = list()
+        self.scenes = dict()  # cutscene file name -> set of scene names
+
+    def report(self, filename, message, *args):
+        self.problems.append("%s: %s" % (filename, message % args))
+
+    def validate(self, names=None, workers=None):
+        if names is None:
+            names = [i for i in resources.list_assets('data') if i.endswith((".yaml", ".yml"))]
+
+        files = load_data_files(names, workers)
+        graphs, cutscenes = dict(), dict()
+        for filename, data in sorted(files.items()):
+            if isinstance(data, Exception):
+                self.report(filename, "could not be loaded: %s", data)
+            elif is_graph_data(data):
+                graphs[filename] = data
+            elif is_cutscene_data(data):
+                cutscenes[filename] = data
+            else:
+                self.report(filename, "is neither an adventure graph nor a cutscene file")
+
+        # graphs refer to scenes, so collect those first
+        for filename, data in cutscenes.items():
+            self.scenes[filename] = set(data)
+            self.validate_cutscenes(filename, data)
+        for filename, data in graphs.items():
+            self.validate_graph(filename, data)
+        self.validate_game_script(graphs)
+        self.validate_code()
+        for problem in resources.verify_manifest(check_hashes=True):
+            self.report("manifest", "%s", problem)
+        return self.problems
+
+    def validate_code(self):
+        for name, minigame in sorted(self.registry.registry.items()):
+            for kind, asset_name, *params in minigame.ASSETS:
+                folder = ASSET_KIND_FOLDERS.get(kind)
+                if folder is not None and not asset_exists(folder, asset_name):
+                    self.report("minigame \"%s\"" % name, "declares unknown %s \"%s\"", kind, asset_name)
+
+        for filename, line, folder, asset_name in find_code_asset_references():
+            if not asset_exists(folder, asset_name):
+                self.report("%s:%d" % (filename, line), "unknown asset \"%s/%s\"", folder, asset_name)
+
+    def validate_game_script(self, graphs):
+        for name, kwargs in Game.build_script():
+            if name in ("set-context", "replace-context"):
+                continue
+            self.validate_minigame("game script", name, kwargs)
+            if name == "GraphView":
+                if kwargs["graph_yaml"] not in graphs:
+                    self.report("game script", "unknown adventure graph \"%s\"", kwargs["graph_yaml"])
+                if not asset_exists("maps", kwargs["graph_tmx"]):
+                    self.report("game script", "unknown map \"%s\"", kwargs["graph_tmx"])
+
+    def validate_minigame(self, where, name, kwargs):
+        minigame = self.registry.registry.get(name)
+        if minigame is None:
+            self.report(where, "unknown minigame \"%s\"", name)
+            return
+
+        kwargs = kwargs or dict()
+        try:
+            inspect.signature(minigame).bind(**kwargs)
+        except TypeError as e:
+            self.report(where, "bad arguments for minigame \"%s\": %s", name, e)
+
+        if name == "Cutscene":
+            scene_file_name = kwargs.get("scene_file_name", "test-cutscene.yaml")
+            scene_name = kwargs.get("scene_name", "cutscene001")
+            if scene_file_name not in self.scenes:
+                self.report(where, "unknown cutscene file \"%s\"", scene_file_name)
+            elif scene_name not in self.scenes[scene_file_name]:
+                self.report(where, "unknown scene \"%s\" in \"%s\"", scene_name, scene_file_name)
+
+    def validate_pre_requisites(self, where, pre_reqs, key_name="key"):
+        for pre_req in pre_reqs or list():
+            for field in (key_name, "value", "hint"):
+                if not isinstance(pre_req, dict) or field not in pre_req:
+                    self.report(where, "pre-requisite without \"%s\"", field)
+
+    def validate_graph(self, filename, data):
+        if "START" not in data:
+            self.report(filename, "no START vertex")
+
+        vertices = {k: v for k, v in data.items() if k != "GLOBAL"}
+        adjacency = dict()
+        for vertex_id, vertex in vertices.items():
+            where = "%s: vertex \"%s\"" % (filename, vertex_id)
+            adjacency[vertex_id] = dict()
+            if not VALID_VERTEX_ID_RE.match(str(vertex_id)):
+                self.report(filename, "invalid vertex ID \"%s\"", vertex_id)
+            if not isinstance(vertex, dict):
+                self.report(where, "is not a mapping")
+                continue
+
+            for field in ("name", "description", "coordinates"):
+                if field not in vertex:
+                    self.report(where, "missing \"%s\"", field)
+            coords = vertex.get("coordinates")
+            if isinstance(coords, dict) and not ("x" in coords and "y" in coords):
+                self.report(where, "coordinates need both x and y")
+
+            icon = vertex.get("icon", "vertex.png")
+            if not asset_exists("images", icon):
+                self.report(where, "unknown icon \"%s\"", icon)
+
+            self.validate_pre_requisites(where, vertex.get("activation-pre-requisites"))
+            if vertex.get("activation") is not None:
+                self.validate_activation(where, vertex["activation"])
+
+            for edge in vertex.get("edges") or list():
+                to_vertex_id = edge.get("vertex-id")
+                if to_vertex_id not in vertices:
+                    self.report(where, "edge to unknown vertex \"%s\"", to_vertex_id)
+                else:
+                    adjacency[vertex_id][to_vertex_id] = edge
+                self.validate_pre_requisites(where, edge.get("pre-requisites"), "name")
+
+        if "START" in adjacency:
+            graph = _Adjacency(adjacency)
+            for vertex_id in sorted(set(vertices) - find_reachable_vertex_ids(graph, "START")):
+                self.report(filename, "vertex \"%s\" can never be reached from START", vertex_id)
+
+    def validate_activation(self, where, activation):
+        command = activation.get("command")
+        if command not in ACTIVATION_COMMANDS:
+            self.report(where, "unknown activation command \"%s\"", command)
+            return
+        if command == "none":
+            return
+
+        kwargs = activation.get("activation-keyword-args") or dict()
+        if "mini-game-name" not in kwargs:
+            self.report(where, "activation without \"mini-game-name\"")
+        else:
+            self.validate_minigame(where, kwargs["mini-game-name"], kwargs.get("mini-game-keyword-args"))
+
+        for post_run_action in kwargs.get("post-run-actions") or list():
+            action = post_run_action.get("action")
+            if action not in RunMinigameActivation.POST_GAME_ACTION_MAP:
+                self.report(where, "unknown post-run action \"%s\"", action)
+                continue
+            self.validate_pre_requisites(where, post_run_action.get("pre-requisites"))
+            if action == SetContextValueAction.ACTION_NAME:
+                for field in ("context-key", "context-value"):
+                    if field not in post_run_action:
+                        self.report(where, "\"%s\" action without \"%s\"", action, field)
+            elif action == RunMinigameAction.ACTION_NAME:
+                if "mini-game-name" not in post_run_action:
+                    self.report(where, "\"%s\" action without \"mini-game-name\"", action)
+                else:
+                    self.validate_minigame(where, post_run_action["mini-game-name"],
+                                           post_run_action.get("mini-game-keyword-args"))
+
+    def validate_cutscenes(self, filename, data):
+        operations = ScriptRunner().operations
+        for scene_name, scene in data.items():
+            where = "%s: scene \"%s\"" % (filename, scene_name)
+            for item in scene.get("script") or list():
+                if not isinstance(item, dict):
+                    self.report(where, "script item is not a mapping")
+                    continue
+                for cmd, kwargs in item.items():
+                    if cmd not in operations:
+                        self.report(where, "unknown command \"%s\"", cmd)
+                        continue
+                    if not isinstance(kwargs, dict):
+                        continue
+                    if cmd == "dialog":
+                        for event in kwargs:
+                            if event not in DIALOG_EVENTS:
+                                self.report(where, "unknown dialog event \"%s\"", event)
+                    for key in CUTSCENE_IMAGE_KEYS:
+                        if kwargs.get(key) and not asset_exists("images", kwargs[key]):
+                            self.report(where, "unknown image \"%s\"", kwargs[key])
+                    for key in CUTSCENE_SOUND_KEYS:
+                        if kwargs.get(key) and not asset_exists("sounds", kwargs[key]):
+                            self.report(where, "unknown sound \"%s\"", kwargs[key])
+
+
+class _Adjacency:
+    """ Just enough of a Graph for find_reachable_vertex_ids """
+
+    def __init__(self, adjacency):
+        self.adjacency = adjacency
+
+
+def validate(registry=None, names=None, workers=None):
+    """ Check data files and return a list of problems, empty if there are none """
+    if registry is None:
+        registry = MinigameRegistry()
+        registry.locate_minigames()
+    return Validator(registry).validate(names, workers)
+
+
+if __name__ == '__main__':
+    problems = validate()
+    for problem in problems:
+        print(problem)
+    print("%d problems found" % len(problems))
+    sys.exit(1 if problems else 0)
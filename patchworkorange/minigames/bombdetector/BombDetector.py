@@ -5,6 +5,7 @@ import collections
 import animation
 from pygame.sprite import Group
 from patchworkorange.core import resources
+from patchworkorange.core.loop import FixedStepLoop
 from patchworkorange.core.minigamemanager import Minigame
 from logging import getLogger
 import pygame
@@ -15,7 +16,6 @@ logger = getLogger(__name__)
 
 WINDOW_SIZE = (1280, 720)
 UPDATE_FREQUENCY = 300
-FRAME_DELAY = 1000.0 / 60.0
 
 GAME_DICT = {}
 
@@ -24,10 +24,15 @@ BEEPER = pygame.USEREVENT + 1
 
 class BombDetector(Minigame):
     GAME_NAME = "BombDetector"
+    ASSETS = (
+        ('image', 'torch.png'),
+        ('sound', 'beeps.wav'),
+        ('sysfont', 'monospace', 15, True, False),
+    )
 
     def __init__(self):
         self.screen = None
-        self.clock = None
+        self.loop = None
         self.font = None
         self.player = None
         self.layers = None
@@ -43,9 +48,9 @@ class BombDetector(Minigame):
         pygame.mixer.init()
 
         self.screen = pygame.display.set_mode(WINDOW_SIZE)
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.SysFont("monospace", 15, bold=True)
-        self.beep = pygame.mixer.Sound(resources.get_sound_asset("beeps.wav"))
+        self.loop = FixedStepLoop(self.update, self.render, UPDATE_FREQUENCY)
+        self.font = resources.load_sys_font("monospace", 15, bold=True)
+        self.beep = resources.load_sound("beeps.wav")
         pygame.mixer.music.load(resources.get_sound_asset("computer_loop.wav"))
         pygame.mixer.music.set_volume(0.01)
 
@@ -62,19 +67,7 @@ class BombDetector(Minigame):
     def run(self, context):
         pygame.mixer.music.play(-1)
 
-        game_loop = True
-        delta_accumulator = 0.0
-        while game_loop:
-            delta = self.clock.tick(UPDATE_FREQUENCY)
-            delta_accumulator += delta
-            if delta_accumulator >= FRAME_DELAY:
-                self.render()
-                delta_accumulator = 0.0
-
-            game_loop = self.update(delta)
-            self.render()
-
-            pygame.display.flip()
+        self.loop.run()
 
         if self.goal_met():
             logger.debug("YEAH! YOU WON!")
@@ -117,7 +110,7 @@ class BombDetector(Minigame):
     def euclidean(a, b):
         return math.sqrt((a[0]-b[0])**2 + (a[1]-b[1])**2)
 
-    def render(self):
+    def render(self, alpha=1.0):
         self.render_layers()
 
         self.visual.fill(self.visual_color)
@@ -194,8 +187,8 @@ class Player(object):
     def __init__(self, rect):
         self.pos = (rect.left // PLAYER_SIZE[0], rect.top // PLAYER_SIZE[1])
         self.rect = rect
-        self.torch = pygame.image.load(resources.get_image_asset("torch.png")).convert_alpha()
-        self.font = pygame.font.SysFont("monospace", 15, bold=True)
+        self.torch = resources.load_image("torch.png").convert_alpha()
+        self.font = resources.load_sys_font("monospace", 15, bold=True)
         self.stop = self.font.render("I should not go to there considering what just happened!!", 1, pygame.Color("Red"))
         self.hit_stop = False
 
@@ -260,7 +253,7 @@ CLEVER_GIRL_2 = pygame.USEREVENT + 3
 
 class JurassicPark(object):
     def __init__(self):
-        self.font = pygame.font.SysFont("monospace", 15, bold=True)
+        self.font = resources.load_sys_font("monospace", 15, bold=True)
         self.muldoon = GAME_DICT["Muldoon"]
         self.girl = GAME_DICT["Girl"]
         self.raptor = GAME_DICT["Raptor"]
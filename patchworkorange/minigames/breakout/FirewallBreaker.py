@@ -2,7 +2,6 @@ import sys
 
 import collections
 import copy
-import random
 
 import pygame
 from logging import getLogger
@@ -13,6 +12,8 @@ from pygame.rect import Rect
 
 from patchworkorange.core.minigamemanager import Minigame
 from patchworkorange.core import resources
+from patchworkorange.core.loop import FixedStepLoop, interpolate
+from patchworkorange.core.sound import sound_manager
 
 from time import sleep
 
@@ -23,11 +24,17 @@ logger = getLogger(__name__)
 
 class FirewallBreaker(Minigame):
     GAME_NAME = "FirewallBreaker"
+    ASSETS = (
+        ('image', 'terminal.png'),
+        ('sound', 'shield.wav'),
+        ('sound', 'open_hat.wav'),
+        ('sound', 'freshquark.wav'),
+        ('sysfont', 'monospace', 15, True, False),
+    )
     UPDATE_FREQUENCY = 300  # Update positioning 300 times per second
-    FRAME_DELAY = 1000.0 / 60.0   # Milliseconds between updates
 
     def __init__(self, map_name="breakout-1.tmx", **kwargs):
-        self.clock = None
+        self.loop = None
         self.screen = None
         self.player = None
         self.ball = None
@@ -44,16 +51,7 @@ class FirewallBreaker(Minigame):
     def run(self, context):
         pygame.mixer.music.play(-1)
 
-        game_loop = True
-        delta_accumulater = 0.0
-        while game_loop:
-            delta = self.clock.tick(self.UPDATE_FREQUENCY)
-            delta_accumulater += delta
-            if delta_accumulater >= self.FRAME_DELAY:
-                self.render()
-                delta_accumulater = 0.0
-            game_loop = self.update(delta)
-            pygame.display.flip()
+        self.loop.run()
 
         if self.ball.lives == 0:
             logger.debug("OH NO! YOU LOST!")
@@ -67,13 +65,13 @@ class FirewallBreaker(Minigame):
     def initialize(self, context):
         pygame.mouse.set_visible(False)
         self.screen = pygame.display.set_mode(WINDOW_SIZE)
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.SysFont("monospace", 15, bold=True)
+        self.loop = FixedStepLoop(self.update, self.render, self.UPDATE_FREQUENCY)
+        self.font = resources.load_sys_font("monospace", 15, bold=True)
         pygame.display.set_caption("Breakout")
         pygame.time.set_timer(pygame.USEREVENT + 4, 10000)
         pygame.mixer.init()
 
-        background = pygame.transform.scale(pygame.image.load(resources.get_image_asset("terminal.png")), WINDOW_SIZE)
+        background = pygame.transform.scale(resources.load_image("terminal.png"), WINDOW_SIZE)
         self.background = background.convert()
 
         pygame.mixer.music.load(resources.get_sound_asset("dance_electro.mp3"))
@@ -95,11 +93,11 @@ class FirewallBreaker(Minigame):
                 self.powerup = None
         return False if self.goal_met() else True
 
-    def render(self):
+    def render(self, alpha=1.0):
         self.screen.blit(self.background, (0, 0))
         self.render_bricks()
-        self.player.render(self.screen)
-        self.ball.render(self.screen)
+        self.player.render(self.screen, alpha)
+        self.ball.render(self.screen, alpha)
         if self.powerup is not None:
             self.powerup.render(self.screen)
 
@@ -122,8 +120,7 @@ class FirewallBreaker(Minigame):
                                 self.ball.move_ball = False
                                 pygame.time.set_timer(pygame.USEREVENT + 2, 300)
                                 pygame.time.set_timer(pygame.USEREVENT + 3, 3000)
-                                sound = pygame.mixer.Sound(resources.get_sound_asset("freshquark.wav"))
-                                sound.play()
+                                sound_manager.play("freshquark.wav", priority=2)
                         self.ball.move_ball = True
                     else:
                         return False
@@ -137,7 +134,7 @@ class FirewallBreaker(Minigame):
             if event.type == pygame.USEREVENT+1:
                 self.check_for_player_collision = True
             if event.type == pygame.USEREVENT+2:
-                item = random.choice(self.bricks)
+                item = self.loop.rng.choice(self.bricks)
                 self.bricks.remove(item)
             if event.type == pygame.USEREVENT+3:
                 self.player.has_powerup = False
@@ -174,8 +171,7 @@ class FirewallBreaker(Minigame):
             self.ball.direction = new_x, -1
             logger.debug(self.ball.direction)
 
-            sound = pygame.mixer.Sound(resources.get_sound_asset("shield.wav"))
-            sound.play()
+            sound_manager.play("shield.wav", priority=1)
 
         for brick in self.bricks[:]:
             if self.ball.bbox.colliderect(brick):
@@ -245,10 +241,9 @@ class FirewallBreaker(Minigame):
 
                 self.bricks.remove(brick)
 
-                sound = pygame.mixer.Sound(resources.get_sound_asset("open_hat.wav"))
-                sound.play()
+                sound_manager.play("open_hat.wav")
 
-                if random.random() < 0.80 and not self.player.has_powerup and self.powerup is None:
+                if self.loop.rng.random() < 0.80 and not self.player.has_powerup and self.powerup is None:
                     self.powerup = PowerUp(brick.topleft)
                 break
 
@@ -282,12 +277,15 @@ class Player(object):
     def __init__(self):
         self.pos = (WINDOW_SIZE[0]//2 - self.SIZE[0]//2, WINDOW_SIZE[1]-50)
         self.rect = pygame.Rect(self.pos, Player.SIZE)
+        self.previous_pos = self.rect.topleft
         self.has_powerup = False
 
-    def render(self, screen):
-        pygame.draw.rect(screen, pygame.Color("red"), self.rect)
+    def render(self, screen, alpha=1.0):
+        rect = pygame.Rect(interpolate(self.previous_pos, self.rect.topleft, alpha), Player.SIZE)
+        pygame.draw.rect(screen, pygame.Color("red"), rect)
 
     def update(self):
+        self.previous_pos = self.rect.topleft
         self.rect.topleft = self.pos
 
     def move(self, key, delta):
@@ -310,14 +308,18 @@ class Ball(object):
     def __init__(self):
         self.pos = Ball.RESET_POS
         self.bbox = pygame.Rect(self.pos, Ball.SIZE)
+        self.previous_pos = self.bbox.topleft
         self.direction = Ball.DEFAULT_DIR
         self.move_ball = False
         self.lives = 4
-        self.font = pygame.font.SysFont("monospace", 15, bold=True)
+        self.font = resources.load_sys_font("monospace", 15, bold=True)
         self.old_bbox = None
 
-    def render(self, screen):
-        pygame.draw.rect(screen, pygame.Color("cyan"), self.bbox)
+    def render(self, screen, alpha=1.0):
+        bbox = self.bbox
+        if self.move_ball:
+            bbox = pygame.Rect(interpolate(self.previous_pos, bbox.topleft, alpha), Ball.SIZE)
+        pygame.draw.rect(screen, pygame.Color("cyan"), bbox)
 
         if self.lives == 3 and not self.move_ball:
             self.show_live_lost_message(screen, "Man this firewall is really tough to break!")
@@ -333,6 +335,7 @@ class Ball(object):
         screen.blit(label, (10, 300))
 
     def update(self, delta, player):
+        self.previous_pos = self.bbox.topleft
         if not self.move_ball:
             self.pos = player.rect.center[0]-self.bbox.width//2, player.rect.top - self.bbox.height-5
         else:
@@ -1,18 +1,19 @@
 import logging
 import sys
-import time
-from collections import deque
 
 import animation
 import pygame
-import yaml
 from pygame.locals import *
 from pygame.sprite import Group, LayeredUpdates, Sprite
 from pygame.transform import smoothscale
 
+from patchworkorange.core import headless
+from patchworkorange.core.adventuregraph import load_yaml_data
 from patchworkorange.core.minigamemanager import Minigame
-from patchworkorange.core.resources import get_image_asset, get_font_asset, get_data_asset, get_sound_asset
+from patchworkorange.core.profiler import profiler
+from patchworkorange.core.resources import get_data_asset, get_sound_asset, load_image, load_font
 from patchworkorange.core.simplefsm import SimpleFSM
+from patchworkorange.core.sound import sound_manager
 from patchworkorange.core.ui import GraphicBox, surface_clipping_context, draw_text
 
 logger = logging.getLogger(__name__)
@@ -54,12 +55,8 @@ def ternone(value, default):
     return default if value is None else value
 
 
-def load_image(filename):
-    return pygame.image.load(get_image_asset(filename))
-
-
-def load_font(name, size):
-    return pygame.font.Font(get_font_asset(name), size)
+def load_scene_file(filename):
+    return load_yaml_data(get_data_asset(filename))
 
 
 set_events = (
@@ -231,8 +228,7 @@ class ScriptRunner:
             pygame.mixer.music.play(-2)
 
         elif action == 'play_sound':
-            s = pygame.mixer.Sound(get_sound_asset(args))
-            s.play()
+            sound_manager.play(args)
 
         elif action == 'quit':
             self.target.running = False
@@ -263,6 +259,11 @@ class ScriptRunner:
 
 class Cutscene(Minigame):
     GAME_NAME = "Cutscene"
+    ASSETS = (
+        ('font', 'pixChicago.ttf', 16),
+        ('image', 'border-default.png'),
+    )
+    FRAME_RATE = 60
     _default_layer = 1
 
     def __init__(self, scene_name="cutscene001", scene_file_name="test-cutscene.yaml"):
@@ -279,10 +280,24 @@ class Cutscene(Minigame):
         self._text = None
 
     def initialize(self, context):
-        with open(get_data_asset(self._scene_file_name)) as fp:
-            config = yaml.load(fp)
+        config = load_scene_file(self._scene_file_name)
         self.script_runner.start(self, config[self._scene_name])
 
+    @classmethod
+    def get_assets(cls, scene_name="cutscene001", scene_file_name="test-cutscene.yaml"):
+        assets = list(cls.ASSETS)
+        script = load_scene_file(scene_file_name)[scene_name]['script']
+        for item in script:
+            for kwargs in item.values():
+                if not isinstance(kwargs, dict):
+                    continue
+                for key in ('background', 'portrait', 'border'):
+                    if kwargs.get(key):
+                        assets.append(('image', kwargs[key]))
+                if kwargs.get('sound'):
+                    assets.append(('sound', kwargs['sound']))
+        return assets
+
     @staticmethod
     def new_sprite(image, rect):
         sprite = Sprite()
@@ -365,32 +380,25 @@ class Cutscene(Minigame):
         self._dialog_open = False
 
     def run(self, context):
-        flip = pygame.display.flip
+        flip = headless.flip
         update = self.update
         draw = self.draw
         handle_events = self.handle_event
         screen = pygame.display.get_surface()
-        clock = time.time
-        frame_time = (1 / 60.) * 1000
-        last_draw = 0
-        times = deque(maxlen=10)
+        clock = pygame.time.Clock()
 
         self.running = True
-        last_frame = clock()
         while self.running:
-            dt = (clock() - last_frame) * 1000
-            last_frame = clock()
-            times.append(dt)
-            dt = sum(times) / 10
-            last_draw += dt
-            handle_events()
-            update(dt)
-            if last_draw >= frame_time:
+            dt = clock.tick(self.FRAME_RATE)
+            with profiler.scope("events"):
+                handle_events()
+            with profiler.scope("update"):
+                update(dt)
+            with profiler.scope("draw"):
                 draw(screen)
-                flip()
-                last_draw = 0
+            flip()
 
-        pygame.mixer.music.fadeout(800)
+        headless.fadeout_music(800)
 
     def draw(self, screen):
         self._sprites.draw(screen)
@@ -400,7 +408,9 @@ class Cutscene(Minigame):
 
     def draw_dialog(self, surface):
         with surface_clipping_context(surface, self._dialog_rect):
-            self._border.draw(surface, self._dialog_rect)
+            # the dialog is animated while it opens
+            opening = self._dialog_rect.size != self.final_rect().size
+            self._border.draw(surface, self._dialog_rect, nearest=opening)
 
         internal = self._dialog_rect.inflate(-48, -6)
         with surface_clipping_context(surface, internal):
@@ -1,5 +1,4 @@
 import os
-import random
 import sys
 from logging import getLogger
 
@@ -10,6 +9,7 @@ from pygame import USEREVENT as FIRIN_MA_LAZ0R
 from pytmx.pytmx import TiledTileLayer
 
 from patchworkorange.core import resources
+from patchworkorange.core.loop import FixedStepLoop
 from patchworkorange.core.minigamemanager import Minigame
 
 logger = getLogger(__name__)
@@ -27,13 +27,18 @@ WIN_SCORE = 20
 
 class FixAServer(Minigame):
     GAME_NAME = "FixAServer"
+    ASSETS = (
+        ('image', 'terminal.png'),
+        ('image', 'server.png'),
+        ('image', 'fixaserver/fixme.png'),
+        ('sysfont', 'monospace', 15, True, False),
+    )
     UPDATE_FREQUENCY = 300
-    FRAME_DELAY = 1000.0 / 60.0
 
     def __init__(self, **kwargs):
         self.win_score = WIN_SCORE if "WIN_SCORE" not in kwargs else kwargs["WIN_SCORE"]
         self.screen = None
-        self.clock = None
+        self.loop = None
         self.font = None
         self.time = 25 * 1000
         self.missed = 0
@@ -41,8 +46,8 @@ class FixAServer(Minigame):
         self.areas = [("Research", (250, 450)), ("Human Resources", (900, 100)), ("Server-Farm", (100, 50)),
                       ("System Admins", (800, 400))]
         self.labels = []
-        self.background = pygame.image.load(resources.get_image_asset("terminal.png"))
-        pc = pygame.image.load(resources.get_image_asset("server.png"))
+        self.background = resources.load_image("terminal.png")
+        pc = resources.load_image("server.png")
         w, h = pc.get_size()
         self.pc = pygame.transform.scale(pc, (w * 2, h * 2)).convert()
         self.pc.set_colorkey((255, 0, 255))
@@ -58,10 +63,10 @@ class FixAServer(Minigame):
         pygame.mouse.set_visible(True)
         self.screen = pygame.display.set_mode(WINDOW_SIZE)
         self.screen.set_colorkey((255, 0, 255))
-        self.clock = pygame.time.Clock()
+        self.loop = FixedStepLoop(self.update, self.render, self.UPDATE_FREQUENCY)
         pygame.display.set_caption(self.GAME_NAME)
         pygame.time.set_timer(FIRIN_MA_LAZ0R + 1, 1200)
-        self.font = pygame.font.SysFont("monospace", 15, bold=True)
+        self.font = resources.load_sys_font("monospace", 15, bold=True)
 
         for area, pos in self.areas:
             self.labels.append(self.font.render(area, 1, pygame.Color("green")))
@@ -69,17 +74,7 @@ class FixAServer(Minigame):
         self.setup_game()
 
     def run(self, context):
-        game_loop = True
-        delta_accumulater = 0.0
-        while game_loop:
-            delta = self.clock.tick(self.UPDATE_FREQUENCY)
-            game_loop = self.update(delta)
-            delta_accumulater += delta
-            if delta_accumulater >= self.FRAME_DELAY:
-                self.render()
-                delta_accumulater = 0.0
-
-            pygame.display.flip()
+        self.loop.run()
 
         if self.goal_met():
             context["{}.won".format(self.GAME_NAME)] = "true"
@@ -109,7 +104,7 @@ class FixAServer(Minigame):
                 return self.handle_mouse_click(event)
             if event.type == FIRIN_MA_LAZ0R + 1:
                 if collections.Counter(FIX_ME)["INACTIVE"] > 7:
-                    r = random.choice(FREE_SERVERS)
+                    r = self.loop.rng.choice(FREE_SERVERS)
                     # if self.score == 20:
                     #    pygame.time.set_timer(FIRIN_MA_LAZ0R+1, 0)
                     #    r = random.choice([7, 8, 9])
@@ -147,7 +142,7 @@ class FixAServer(Minigame):
 
         return False if self.goal_met() else True
 
-    def render(self):
+    def render(self, alpha=1.0):
         # self.screen.fill(pygame.Color("black"))
         self.screen.blit(self.background, (0, 0))
 
@@ -198,7 +193,7 @@ class FixAServer(Minigame):
         for i, server in enumerate(FIX_ME):
             if server == "ACTIVE":
                 server_pos = GAME_DICT["Server_{}".format(i)]
-                fixme_surface = pygame.image.load(resources.get_image_asset(os.path.join("fixaserver", "fixme.png")))
+                fixme_surface = resources.load_image(os.path.join("fixaserver", "fixme.png"))
                 pos = tuple([x - y for x, y in zip(server_pos.center, (
                     fixme_surface.get_rect().width // 2, fixme_surface.get_rect().height // 2))])
                 self.screen.blit(fixme_surface, pos)
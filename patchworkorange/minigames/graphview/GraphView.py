@@ -1,5 +1,6 @@
 import random
 import sys
+from collections import OrderedDict
 from functools import partial
 from logging import getLogger
 from math import atan2, pi
@@ -8,15 +9,16 @@ import pygame
 import pyscroll
 from animation import Task, Animation
 from pygame.rect import Rect
-from pygame.sprite import Sprite, Group, spritecollide, LayeredUpdates
+from pygame.sprite import Sprite, Group, LayeredUpdates
 from pygame.transform import scale
 from pytmx import load_pygame
 
-from patchworkorange.core import resources
-from patchworkorange.core.adventuregraph import InvalidEdgeException
-from patchworkorange.core.adventuregraph import load_yaml_data, Visitor, build_graph_from_yaml_data
+from patchworkorange.core import headless, resources
+from patchworkorange.core.adventuregraph import load_graph, Visitor, PreRequisiteTracker, PathFinder
 from patchworkorange.core.clippie import Clippie
 from patchworkorange.core.minigamemanager import Minigame, ExitGameAction
+from patchworkorange.core.prefetch import prefetch_neighbours
+from patchworkorange.core.profiler import profiler
 from patchworkorange.core.resources import get_data_asset
 from patchworkorange.core.supersprite import RelativeGroup
 from patchworkorange.core.ui import GraphicBox, PyscrollGroup, draw_text
@@ -26,10 +28,34 @@ logger = getLogger(__name__)
 COLOR_KEY = (255, 0, 255)
 
 
+def get_sprite_states(group):
+    """What each sprite of a group looks like and where it is, to compare with another frame"""
+    return {s: (s.image, None if s.rect is None else tuple(s.rect)) for s in group.sprites()}
+
+
 class GraphView(Minigame):
     GAME_NAME = "GraphView"
-
-    def __init__(self, graph_yaml=None, graph_tmx=None):
+    ASSETS = (
+        ('image', 'border-default.png'),
+        ('image', 'hud.png'),
+        ('image', 'button.png'),
+        ('image', 'border-clippie.png'),
+        ('image', 'callout-clippie.png'),
+        ('image', 'clippie1.png'),
+        ('font', 'IHATCS__.TTF', 24),
+        ('sysfont', 'monospace', 24, True, False),
+        ('sysfont', 'Courier', 24, True, False),
+    )
+
+    # only update the parts of the display that changed and skip frames where nothing did
+    DIRTY_RECTS = True
+    # draw all the edges into one layer instead of a sprite per edge
+    EDGE_OVERLAY = True
+
+    def __init__(self, graph_yaml=None, graph_tmx=None, dirty_rects=None, edge_overlay=None):
+        self.dirty_rects = self.DIRTY_RECTS if dirty_rects is None else dirty_rects
+        self.edge_overlay = self.EDGE_OVERLAY if edge_overlay is None else edge_overlay
+        self.edge_layer = None
         self.visitor = None
         self.scroll_group = None
         self.graph_yaml = graph_yaml
@@ -41,6 +67,12 @@ class GraphView(Minigame):
         self.pointer = None
         self.sprites = LayeredUpdates()
         self._animations = Group()
+        self.pre_requisites = None
+        self.path_finder = None
+        self.clippie = None
+        self._edge_sprites_by_pre_reqs = dict()
+        self._frame_state = None
+        self._hud_strip_rect = None
 
     def animate(self, *args, **kwargs):
         ani = Animation(*args, **kwargs)
@@ -50,8 +82,10 @@ class GraphView(Minigame):
     def initialize(self, context):
 
         screen = pygame.display.get_surface()
-        adventure_graph = build_graph_from_yaml_data(load_yaml_data(get_data_asset(self.graph_yaml)))
+        adventure_graph = load_graph(get_data_asset(self.graph_yaml), resources.get_cache_dir('graphs'))
         self.visitor = Visitor.visit_graph(adventure_graph, context)
+        self.pre_requisites = PreRequisiteTracker(context)
+        self.path_finder = PathFinder(adventure_graph, context)
 
         tmx_data = load_pygame(resources.get_map_asset(self.graph_tmx))
         map_data = pyscroll.TiledMapData(tmx_data)
@@ -67,7 +101,7 @@ class GraphView(Minigame):
 
         sw, sh = screen.get_size()
         hud_rect = Rect(20, sh * .76, sw * .80, sh * .2)
-        border_image = load_image('border-default.png').convert_alpha()
+        border_image = resources.load_image('border-default.png').convert_alpha()
         self.hud_group = HUDGroup(hud_rect, border_image)
         info = VertexInfoSprite(self.visitor)
         info.rect = Rect(12, 12, hud_rect.width - 250, hud_rect.height - 24)
@@ -91,30 +125,58 @@ class GraphView(Minigame):
             key.sort()
             key = tuple(key)
             if key not in edge_sprites:
-                edge_sprite = EdgeSprite(edge, self.scroll_group)
+                edge_sprite = EdgeSprite(edge) if self.edge_overlay else EdgeSprite(edge, self.scroll_group)
                 from_vertex_sprite = self.vertex_group[edge.from_vertex.vertex_id]
                 to_vertex_sprite = self.vertex_group[edge.to_vertex.vertex_id]
                 from_vertex_sprite.edge_sprites.append(edge_sprite)
                 to_vertex_sprite.edge_sprites.append(edge_sprite)
                 edge_sprites[key] = edge_sprite
 
+        if self.edge_overlay:
+            world_size = tmx_data.width * tmx_data.tilewidth, tmx_data.height * tmx_data.tileheight
+            self.edge_layer = EdgeLayer(world_size, edge_sprites.values(), self.scroll_group)
+
+        for vertex_sprite in self.vertex_group.lookup.values():
+            self.pre_requisites.watch(vertex_sprite.vertex.activation_pre_requisites)
+            for edge_sprite in vertex_sprite.edge_sprites:
+                pre_reqs = edge_sprite.edge.traversal_pre_requisites
+                self.pre_requisites.watch(pre_reqs)
+                self._edge_sprites_by_pre_reqs.setdefault(pre_reqs, set()).add(edge_sprite)
+
         self.visitor_cursor = VisitorCursor(self.visitor, self.pointer, self.vertex_group, self.scroll_group)
+        self.visitor_cursor.pre_requisites = self.pre_requisites
+        self.visitor_cursor.path_finder = self.path_finder
+        self.visitor_cursor.minigame_registry = self.minigame_manager.minigame_registry
+        prefetch_neighbours(self.visitor_cursor.minigame_registry, self.visitor.current_vertex)
 
         if context.get('show_clippie', False):
-            c = Clippie(self.sprites, self._animations, context)
-            c.rect.topleft = 1100, 550
-            self.sprites.add(c)
-            self.visitor_cursor.clippie = c
-
-        clock = pygame.time.Clock()
+            self.clippie = Clippie(self.sprites, self._animations, context)
+            self.clippie.rect.topleft = 1100, 550
+            self.sprites.add(self.clippie)
+            self.visitor_cursor.clippie = self.clippie
 
-        pygame.display.flip()
+        headless.flip()
         pygame.mouse.set_visible(False)
 
+        try:
+            self.main_loop(screen, map_layer_rect)
+        finally:
+            self.pre_requisites.close()
+            self.path_finder.close()
+            if self.clippie is not None:
+                self.clippie.close()
+
+    def main_loop(self, screen, map_layer_rect):
+        clock = pygame.time.Clock()
+        sw, sh = screen.get_size()
+        self._hud_strip_rect = Rect(0, int(sh * .75), sw, sh - int(sh * .75))
+
         while True:
             delta = clock.tick(60)
-            events = pygame.event.get()
-            self.hud_group.update(delta, events)
+            with profiler.scope("events"):
+                events = pygame.event.get()
+            with profiler.scope("update"):
+                self.hud_group.update(delta, events)
             for event in events:
                 if event.type == pygame.QUIT:
                     sys.exit(0)
@@ -122,7 +184,8 @@ class GraphView(Minigame):
                     vertex_id = self.visitor_cursor.current_vertex_sprite.vertex_id
                     if self.hud_button.handle_click or pygame.K_SPACE == event.key and vertex_id == self.pointer.selected_vertex_id:
                         self.hud_button.handle_click = False
-                        if self.visitor.current_vertex.can_activate(self.visitor.context):
+                        vertex = self.visitor.current_vertex
+                        if vertex.is_activatable and self.pre_requisites.passes(vertex.activation_pre_requisites):
                             activation_dict = self.visitor.activate_current_vertex()
                             if activation_dict["command"] == "launch-mini-game":
                                 r = RunMinigameActivation(activation_dict["command"],
@@ -138,30 +201,82 @@ class GraphView(Minigame):
                                 if self.has_exit_action(unhandled_actions):
                                     return
 
+                                # the minigame drew over everything
+                                self._frame_state = None
+
                         else:
-                            vertex = self.visitor.current_vertex
-                            failing = vertex.activation_pre_requisites.get_failing_pre_requisites(self.visitor.context)
+                            failing = self.pre_requisites.get_failing_pre_requisites(vertex.activation_pre_requisites)
                             self.visitor.context['gamestate.dialog_text'] = failing[0].hint
                             self.visitor_cursor.animations.add(Task(self.visitor_cursor.clear_hint, 5000))
 
-            self.scroll_group.update(delta, events)
-            # self.hud_group.update(delta, events)
-            self.sprites.update(delta, events)
-            self._animations.update(delta)
-            self._update_edge_colors()
+            with profiler.scope("update"):
+                self.scroll_group.update(delta, events)
+                # self.hud_group.update(delta, events)
+                self.sprites.update(delta, events)
+                self._animations.update(delta)
+                self._update_edge_colors()
+
+                x_offset = ((self.visitor_cursor.rect.x - self.scroll_group.view.x) - self.pointer.rect.x) / 2
+                self.scroll_group.center((self.visitor_cursor.rect.x - x_offset, 0))
+
+            if not self.dirty_rects:
+                with profiler.scope("draw"):
+                    self.draw(screen, map_layer_rect)
+                headless.flip()
+                continue
+
+            with profiler.scope("draw"):
+                dirty = self.find_dirty_rects(map_layer_rect)
+                if dirty is None or dirty:
+                    self.draw(screen, map_layer_rect)
+            if dirty is None:
+                headless.flip()
+            else:
+                # even with nothing to show it was a frame, as far as the profiler is concerned
+                headless.update(dirty)
 
-            x_offset = ((self.visitor_cursor.rect.x - self.scroll_group.view.x) - self.pointer.rect.x) / 2
-            self.scroll_group.center((self.visitor_cursor.rect.x - x_offset, 0))
+    def draw(self, screen, map_layer_rect):
+        self.scroll_group.draw(screen, map_layer_rect)
 
-            self.scroll_group.draw(screen, map_layer_rect)
+        screen.fill((200, 200, 200), self._hud_strip_rect)
 
-            screen.fill((200, 200, 200), (0, sh * .75, 1280, 200))
+        self.hud_group.draw(screen)
+        self.sprites.draw(screen)
 
-            self.hud_group.draw(screen)
-            self.sprites.draw(screen)
+        screen.blit(self.pointer.image, self.pointer.rect)
 
-            screen.blit(self.pointer.image, self.pointer.rect)
-            pygame.display.flip()
+    def find_dirty_rects(self, map_layer_rect):
+        """Compare the scene to the last frame and return the areas of the screen that changed.
+
+        An empty list means nothing changed and the frame can be skipped. None means the whole screen has to be
+        updated.
+        """
+        # the profiler overlay is drawn over the map
+        map_state = tuple(self.scroll_group.view), get_sprite_states(self.scroll_group), profiler.overlay_visible
+        hud_state = tuple(self.hud_group.border_rect), get_sprite_states(self.hud_group)
+        overlay_state = get_sprite_states(self.sprites)
+
+        last_state = self._frame_state
+        self._frame_state = map_state, hud_state, overlay_state
+        if last_state is None:
+            return None
+
+        last_map_state, last_hud_state, last_overlay_state = last_state
+        dirty = list()
+        if map_state != last_map_state:
+            dirty.append(map_layer_rect)
+        if hud_state != last_hud_state:
+            dirty.append(self._hud_strip_rect)
+
+        # sprites over the map and hud, including ones that were removed
+        for sprite in set(overlay_state) | set(last_overlay_state):
+            new, old = overlay_state.get(sprite), last_overlay_state.get(sprite)
+            if new != old:
+                for state in (new, old):
+                    if state is not None and state[1] is not None:
+                        dirty.append(Rect(state[1]))
+
+        return dirty
 
     def has_exit_action(self, unhandle_actions):
         for u in unhandle_actions:
@@ -172,21 +287,33 @@ class GraphView(Minigame):
     def run(self, context):
         pass
 
+    @classmethod
+    def get_assets(cls, graph_yaml=None, graph_tmx=None):
+        assets = list(cls.ASSETS)
+        graph = load_graph(get_data_asset(graph_yaml), resources.get_cache_dir('graphs'))
+        icons = {vertex.icon for vertex in graph.vertex_index.values()}
+        assets.extend(('image', icon) for icon in sorted(icons))
+        return assets
+
     def _update_edge_colors(self):
-        for key, vertex_sprite in self.vertex_group.lookup.items():
-            for e in vertex_sprite.edge_sprites:
-                if e.edge.can_traverse(self.visitor.context):
+        # only the edges whose pre-requisites started or stopped passing need a look
+        changed = list()
+        for pre_reqs in self.pre_requisites.refresh():
+            if self.pre_requisites.passes(pre_reqs):
+                for e in self._edge_sprites_by_pre_reqs.get(pre_reqs, ()):
                     e.color = pygame.Color("GREEN")
+                    changed.append(e)
 
-
-def load_image(filename):
-    return pygame.image.load(resources.get_image_asset(filename))
+        if changed and self.edge_layer is not None:
+            self.edge_layer.redraw(changed)
+            # the layer was changed in place, so the dirty rects can't see it
+            self._frame_state = None
 
 
 class VisitorCursor(Sprite):
     PURPLE = (255, 0, 255)
     _layer = 3
-    image = pygame.image.load(resources.get_image_asset("visitor.png"))
+    image = resources.load_image("visitor.png")
 
     def __init__(self, visitor, pointer, vertex_sprite_group, *groups):
         super(VisitorCursor, self).__init__(*groups)
@@ -198,6 +325,10 @@ class VisitorCursor(Sprite):
         self.rect.center = self.visitor.current_vertex.coordinates
         self.animations = Group()
         self.moving = False
+        self.minigame_registry = None
+        self.pre_requisites = None
+        self.path_finder = None
+        self.route = list()  # vertex IDs still to visit when travelling to a vertex that is further away
         self.image = self.image.convert()
         self.image.set_colorkey(COLOR_KEY)
 
@@ -212,33 +343,54 @@ class VisitorCursor(Sprite):
         if self.pointer.selected_vertex_id is None or self.moving:
             return
 
-        try:
-            edge = self.visitor.current_vertex.get_edge_by_to_vertex_id(self.pointer.selected_vertex_id)
-            if edge.can_traverse(self.visitor.context):
-                self.goto_destination(self.pointer.selected_vertex_id)
-                self.pointer.selected_vertex_id = None
-            else:
-                failing = edge.traversal_pre_requisites.get_failing_pre_requisites(self.visitor.context)
-                for f in failing:
-                    fail_msg = "Pre-Requisite not met: (Key: {}, Value: {}, Hint: {})".format(f.key, f.value, f.hint)
-                    logger.debug(fail_msg)
-
-                    if self.visitor.context['show_clippie']:
-                        self.clippie.queue_text("I see that you are trying to go there.")
-                        self.clippie.queue_text("Do you want some help?", 2000)
-                        self.clippie.queue_text("Its just not possible to go there now.", 2000)
-                        self.clippie.queue_text("Are you sure you know what you are doing?")
-
-                    self.visitor.context['gamestate.dialog_text'] = f.hint
-                    self.animations.add(Task(self.clear_hint, 5000))
-                    self.pointer.selected_vertex_id = None  # to avoid spam in logger
+        edge = self.visitor.current_vertex.get_edge(self.pointer.selected_vertex_id)
+        if edge is None:
+            # selecting the vertex the visitor is on is how it gets activated, so stay selected
+            if self.pointer.selected_vertex_id != self.visitor.current_vertex.vertex_id:
+                self.auto_travel(self.pointer.selected_vertex_id)
+            return
 
-                    break  # just show the first hint
+        failing = self.pre_requisites.get_failing_pre_requisites(edge.traversal_pre_requisites)
+        if not failing:
+            self.goto_destination(self.pointer.selected_vertex_id)
+            self.pointer.selected_vertex_id = None
+        else:
+            for f in failing:
+                fail_msg = "Pre-Requisite not met: (Key: {}, Value: {}, Hint: {})".format(f.key, f.value, f.hint)
+                logger.debug(fail_msg)
+
+                if self.visitor.context['show_clippie']:
+                    self.clippie.queue_text("I see that you are trying to go there.")
+                    self.clippie.queue_text("Do you want some help?", 2000)
+                    self.clippie.queue_text("Its just not possible to go there now.", 2000)
+                    self.clippie.queue_text("Are you sure you know what you are doing?")
+
+                self.visitor.context['gamestate.dialog_text'] = f.hint
+                self.animations.add(Task(self.clear_hint, 5000))
+                self.pointer.selected_vertex_id = None  # to avoid spam in logger
+
+                break  # just show the first hint
+
+    def auto_travel(self, destination_vertex_id):
+        """Walk the shortest open path to a vertex that isn't next to the current one"""
+        if self.path_finder is None:
+            return
 
-        except InvalidEdgeException:
+        path = self.path_finder.shortest_path(self.visitor.current_vertex.vertex_id, destination_vertex_id)
+        if path is None:
+            # no open path, don't look for one again every frame
+            self.pointer.selected_vertex_id = None
+            return
+        if len(path) < 2:
             return
 
+        logger.debug("Travelling to %s through %s" % (destination_vertex_id, path))
+        self.route = path[2:]
+        self.goto_destination(path[1])
+        self.pointer.selected_vertex_id = None
+
     def goto_destination(self, destination_vertex_id):
+        self.moving = True
         x, y = self.visitor.graph.vertex_index[destination_vertex_id].coordinates
         # x_anim = Animation(self.rect, centerx=x, duration=1000, transition="in_quad")
         # y_anim = Animation(self.rect, centery=y, duration=1000, transition="out_quad")
@@ -254,6 +406,17 @@ class VisitorCursor(Sprite):
         self.visitor.go_to_vertex(destination_vertex_id)
         self.current_vertex_sprite = self.vertex_sprite_group[destination_vertex_id]
 
+        if self.route:
+            next_vertex_id = self.route.pop(0)
+            edge = self.visitor.current_vertex.get_edge(next_vertex_id)
+            if edge is not None and self.pre_requisites.passes(edge.traversal_pre_requisites):
+                self.goto_destination(next_vertex_id)
+                return
+            self.route = list()
+
+        if self.minigame_registry is not None:
+            prefetch_neighbours(self.minigame_registry, self.visitor.current_vertex)
+
         if self.visitor.context['show_clippie']:
             msg = random.choice([
                 'Are you sure you want to go there?',
@@ -273,7 +436,7 @@ class VertexSprite(Sprite):
         self.vertex_id = vertex.vertex_id
 
         # really shouldn't do stuff like this in __init__, but oh well
-        image = pygame.image.load(resources.get_image_asset(vertex.icon))
+        image = resources.load_image(vertex.icon)
         w, h = image.get_size()
         image = scale(image, (w * 2, h * 2))
         self.image = image.convert()
@@ -293,6 +456,12 @@ class EdgeSprite(Sprite):
     DOWN = 1
     LEFT = 2
     RIGHT = 3
+    LINE_WIDTH = 3
+
+    # edges with the same ends, color and line width share an image, least recently used are dropped first
+    _image_cache = OrderedDict()  # (coordinates, color, line width) -> (image, rect)
+    _image_cache_pixels = 0
+    max_pixels = 8 * 1024 * 1024
 
     def __init__(self, edge, *groups):
         super(EdgeSprite, self).__init__(*groups)
@@ -300,27 +469,54 @@ class EdgeSprite(Sprite):
         self.image = None
         self.rect = None
         self.color = self.RED
+        self._image_key = None
+
+    @property
+    def image_key(self):
+        return self.get_coordinates(), tuple(pygame.Color(*self.color)), self.LINE_WIDTH
 
     def update(self, delta, events):
-        # if self.image is None:
-        self.render_image()
+        # only render again when the color or the ends changed, so an idle edge keeps the same image
+        key = self.image_key
+        if key != self._image_key:
+            self._image_key = key
+            self.render_image()
 
     def render_image(self):
+        cls = EdgeSprite
+        key = self.image_key
+        try:
+            image, rect = cls._image_cache[key]
+        except KeyError:
+            image, rect = self.draw_edge()
+            cls._image_cache[key] = image, rect
+            cls._image_cache_pixels += rect.width * rect.height
+            # never evict the image that was just added
+            while cls._image_cache_pixels > cls.max_pixels and len(cls._image_cache) > 1:
+                old_key, (old_image, old_rect) = cls._image_cache.popitem(last=False)
+                cls._image_cache_pixels -= old_rect.width * old_rect.height
+        else:
+            cls._image_cache.move_to_end(key)
+        self.image = image
+        self.rect = rect.copy()
+
+    def draw_edge(self):
         """Because we need the path lines to scroll around on the scroll layer and always at the right depth, we can't
         just draw them to the screen. Instead, we create a sprite per distinct edge and try to line up the rect of
         the sprite so that two of its corners are at the center of the two nodes connected by the edge. Then we draw
         a line through the rect between the two connecting corners. This is harder to do correctly than it sounds...
         """
-        line_width = 3
+        line_width = self.LINE_WIDTH
+        color = self.color
         x1, y1, x2, y2 = self.get_coordinates()
 
         w, h = (max(abs(x2 - x1), line_width), max(abs(y2 - y1), line_width))
         size = (w, h)
 
-        self.rect = Rect((0, 0), size)
-        self.image = pygame.Surface(size, pygame.SRCALPHA).convert()
-        self.image.set_colorkey(COLOR_KEY)
-        self.image.fill(COLOR_KEY)
+        rect = Rect((0, 0), size)
+        image = pygame.Surface(size, pygame.SRCALPHA).convert()
+        image.set_colorkey(COLOR_KEY)
+        image.fill(COLOR_KEY)
 
         # Remember, Y axis is inverted
         angle = (atan2(y2 - y1, x2 - x1) * 180.0) / pi
@@ -328,20 +524,22 @@ class EdgeSprite(Sprite):
         angle = (angle + 360) % 360
 
         if h == line_width or w == line_width:
-            self.image.fill(self.color)
+            image.fill(color)
 
         if 0 <= angle < 90:  # down and to the right, Quadrant IV
-            self.rect.topleft = x1, y1
-            pygame.draw.line(self.image, self.color, (0, 0), size, line_width)
+            rect.topleft = x1, y1
+            pygame.draw.line(image, color, (0, 0), size, line_width)
         elif 90 <= angle < 180:  # down and to the left, Quadrant III
-            self.rect.topright = x1, y1
-            pygame.draw.line(self.image, self.color, (w, 0), (0, h), line_width)
+            rect.topright = x1, y1
+            pygame.draw.line(image, color, (w, 0), (0, h), line_width)
         elif 180 <= angle < 270:  # up and to the left, Quadrant II
-            self.rect.bottomright = x1, y1
-            pygame.draw.line(self.image, self.color, (0, 0), size, line_width)
+            rect.bottomright = x1, y1
+            pygame.draw.line(image, color, (0, 0), size, line_width)
         elif 270 <= angle < 360:  # up and to the right, Quadrant I
-            self.rect.bottomleft = x1, y1
-            pygame.draw.line(self.image, self.color, (0, h), (w, 0), line_width)
+            rect.bottomleft = x1, y1
+            pygame.draw.line(image, color, (0, h), (w, 0), line_width)
+
+        return image, rect
 
     def get_coordinates(self):
         x1, y1 = self.edge.from_vertex.coordinates
@@ -349,12 +547,44 @@ class EdgeSprite(Sprite):
         return x1, y1, x2, y2
 
 
+class EdgeLayer(Sprite):
+    """All the edges drawn into one world sized image, so the map draws them with a single blit.
+
+    The EdgeSprites are not drawn themselves, they only provide the image of each edge. Only the edges passed to
+    redraw are drawn again, on top of what was there before.
+    """
+    _layer = 1
+
+    def __init__(self, size, edge_sprites, *groups):
+        super(EdgeLayer, self).__init__(*groups)
+        self.edge_sprites = list(edge_sprites)
+        for edge_sprite in self.edge_sprites:
+            edge_sprite.update(0, [])
+
+        # edges can run off the edge of the map
+        self.rect = Rect((0, 0), size)
+        for edge_sprite in self.edge_sprites:
+            self.rect.union_ip(edge_sprite.rect)
+
+        self.image = pygame.Surface(self.rect.size).convert()
+        self.image.fill(COLOR_KEY)
+        self.redraw(self.edge_sprites)
+        self.image.set_colorkey(COLOR_KEY, pygame.RLEACCEL)
+
+    def redraw(self, edge_sprites):
+        x, y = self.rect.topleft
+        for edge_sprite in edge_sprites:
+            edge_sprite.update(0, [])
+            self.image.blit(edge_sprite.image, edge_sprite.rect.move(-x, -y))
+
+
 class PointerSprite(Sprite):
     _layer = 999
-    image = pygame.image.load(resources.get_image_asset("pointer.png"))
+    image = resources.load_image("pointer.png")
     SPEED = 100  # pixels per second
     MAX_SPEED = 500
     ACCELERATION = .1
+    SNAP_RADIUS = 48  # pixels
     MOVE = {  # pixels per second X, pixels per second Y
         pygame.K_LEFT: (-SPEED, 0),
         pygame.K_RIGHT: (SPEED, 0),
@@ -397,7 +627,7 @@ class PointerSprite(Sprite):
                 self.check_vertex_collision()
             elif pygame.KEYDOWN == event.type:
                 if pygame.K_SPACE == event.key:
-                    self.check_vertex_collision()
+                    self.check_vertex_collision(snap=True)
                 else:
                     x, y = self.movement
                     dx, dy = self.MOVE.get(event.key, (0.0, 0.0))
@@ -408,18 +638,24 @@ class PointerSprite(Sprite):
                 elif pygame.K_UP == event.key or pygame.K_DOWN == event.key:
                     self.movement = (self.movement[0], 0.0)
 
-    def check_vertex_collision(self):
-        vertices = spritecollide(self, self.vertex_group, False, self.collide_hotspot)
+    def check_vertex_collision(self, snap=False):
+        """Select the vertex under the hotspot. With snap, fall back to the nearest vertex close to the hotspot, which
+        makes it a lot easier to aim with the keyboard."""
+        hotspot = self.get_hotspot()
+        vertices = self.vertex_group.sprites_at(hotspot)
+        if not vertices and snap:
+            nearest = self.vertex_group.nearest(hotspot, self.SNAP_RADIUS)
+            if nearest is not None:
+                vertices = [nearest]
         if vertices:
             self.selected_vertex_id = vertices[0].vertex.vertex_id
             logger.debug("Selected vertex %s" % self.selected_vertex_id)
 
-    @staticmethod
-    def collide_hotspot(pointer, vertex_sprite):
-        view_x, view_y = pointer.scroll_group.view.topleft
-        pointer_x, pointer_y = pointer.rect.topleft
-        hotspot = (view_x + pointer_x, view_y + pointer_y)
-        return vertex_sprite.rect.collidepoint(hotspot)
+    def get_hotspot(self):
+        """Position of the hotspot in world space"""
+        view_x, view_y = self.scroll_group.view.topleft
+        pointer_x, pointer_y = self.rect.topleft
+        return view_x + pointer_x, view_y + pointer_y
 
     def calculate_movement(self, delta):
         amount = delta / 1000.0
@@ -438,9 +674,17 @@ class PointerSprite(Sprite):
 
 
 class VertexLookupGroup(Group):
+    """Vertex sprites, looked up by vertex ID or by position in world space.
+
+    Positions are indexed with a uniform grid, so hit testing only looks at the few sprites near a point. Vertices
+    don't move, so a sprite is indexed by the rect it has when it is added.
+    """
+    CELL_SIZE = 64  # pixels
 
     def __init__(self, *sprites):
         self.lookup = {}
+        self._grid = {}  # (column, row) -> list of sprites touching that cell
+        self._cells = {}  # sprite -> cells it was indexed in
         super(VertexLookupGroup, self).__init__(*sprites)
 
     def add(self, *sprites):
@@ -448,6 +692,46 @@ class VertexLookupGroup(Group):
         self.lookup.update({s.vertex_id: s for s in sprites})
         super(VertexLookupGroup, self).add(*sprites)
 
+    def add_internal(self, sprite, *args):
+        super(VertexLookupGroup, self).add_internal(sprite, *args)
+        if sprite in self._cells:
+            return
+        cells = self._cells_in_rect(sprite.rect)
+        for cell in cells:
+            self._grid.setdefault(cell, []).append(sprite)
+        self._cells[sprite] = cells
+
+    def remove_internal(self, sprite):
+        super(VertexLookupGroup, self).remove_internal(sprite)
+        for cell in self._cells.pop(sprite, ()):
+            self._grid[cell].remove(sprite)
+        if self.lookup.get(sprite.vertex_id) is sprite:
+            del self.lookup[sprite.vertex_id]
+
+    def _cells_in_rect(self, rect):
+        size = self.CELL_SIZE
+        return [(column, row)
+                for column in range(rect.left // size, (rect.right - 1) // size + 1)
+                for row in range(rect.top // size, (rect.bottom - 1) // size + 1)]
+
+    def sprites_at(self, point):
+        """Sprites whose rect contains a point in world space, in the order they were added"""
+        x, y = point
+        cell = int(x) // self.CELL_SIZE, int(y) // self.CELL_SIZE
+        return [s for s in self._grid.get(cell, ()) if s.rect.collidepoint(point)]
+
+    def nearest(self, point, radius):
+        """The sprite with its center closest to a point in world space, or None if none is within radius"""
+        x, y = point
+        nearest, nearest_distance = None, radius * radius
+        for cell in self._cells_in_rect(Rect(x - radius, y - radius, radius * 2 + 1, radius * 2 + 1)):
+            for sprite in self._grid.get(cell, ()):
+                cx, cy = sprite.rect.center
+                distance = (cx - x) ** 2 + (cy - y) ** 2
+                if distance <= nearest_distance:
+                    nearest, nearest_distance = sprite, distance
+        return nearest
+
     def __getitem__(self, vertex_id):
         return self.lookup[vertex_id]
 
@@ -463,6 +747,10 @@ class HUDGroup(RelativeGroup):
         self._border_rect = None  # type: pygame.Rect
         self._border = GraphicBox(border_image, fill_tiles=True)
 
+    @property
+    def border_rect(self):
+        return self._border_rect
+
     def open(self):
         self._border_rect = Rect(0, 0, 64, 64, center=self.rect.center)
         ani = self.animate(self._border_rect,
@@ -473,7 +761,8 @@ class HUDGroup(RelativeGroup):
         ani.schedule(lambda: setattr(self._border_rect, "center", self.rect.center), 'on update')
 
     def draw(self, surface):
-        self._border.draw(surface, self._border_rect)
+        # the border is animated while it opens
+        self._border.draw(surface, self._border_rect, nearest=self._border_rect.size != self.rect.size)
         super(HUDGroup, self).draw(surface)
 
 
@@ -482,7 +771,7 @@ class HUDSprite(Sprite):
 
     def __init__(self):
         super(HUDSprite, self).__init__()
-        self.image = pygame.image.load(resources.get_image_asset("hud.png")).convert()
+        self.image = resources.load_image("hud.png").convert()
         self.image.set_colorkey(COLOR_KEY)
         self.rect = self.image.get_rect()
 
@@ -492,7 +781,7 @@ class HUDButton(Sprite):
 
     def __init__(self, hud_group, x, y):
         super(HUDButton, self).__init__()
-        self.image = pygame.image.load(resources.get_image_asset("button.png")).convert()
+        self.image = resources.load_image("button.png").convert()
         self.image.set_colorkey(COLOR_KEY)
         self.rect = self.image.get_rect()
         self.rect.topleft = (x, y)
@@ -515,7 +804,7 @@ class HUDButton(Sprite):
                     logger.debug("button clicked!")
 
     def render_text(self):
-        font = pygame.font.SysFont("monospace", 24, bold=True)
+        font = resources.load_sys_font("monospace", 24, bold=True)
         self.label = font.render(self.text, 1, pygame.Color("black"))
         text_center = 72 - 6.5 * len(self.text)  # not precise
         rect = Rect(text_center, 10, 0, 0)
@@ -532,9 +821,18 @@ class VertexInfoSprite(Sprite):
         self.image = None
         self.visitor = visitor
         self.vertex_info_string = None
-        self.font = pygame.font.SysFont("Courier", 24, True)
+        self.font = resources.load_sys_font("Courier", 24, True)
+        self._info_state = None
 
     def update(self, delta, events):
+        # the text only changes with the dialog text or the current vertex
+        context = self.visitor.context
+        if hasattr(context, 'get_version'):
+            info_state = context.get_version('gamestate.dialog_text'), self.visitor.current_vertex
+            if info_state == self._info_state:
+                return
+            self._info_state = info_state
+
         info_string = self.get_current_info_string()
         if self.vertex_info_string != info_string:
             self.vertex_info_string = info_string
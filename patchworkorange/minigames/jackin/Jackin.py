@@ -1,8 +1,10 @@
+import hashlib
 import logging
+import mmap
+import os
 import random
 import sys
-import time
-from collections import deque
+import tempfile
 from functools import partial
 
 import pygame
@@ -12,12 +14,16 @@ from pygame.math import Vector2
 from pygame.sprite import Group, LayeredUpdates, Sprite
 from pygame.transform import smoothscale
 
+from patchworkorange.core import headless
+from patchworkorange.core.profiler import profiler
 from patchworkorange.core.minigamemanager import Minigame
-from patchworkorange.core.resources import get_image_asset, get_font_asset, get_sound_asset
+from patchworkorange.core.resources import get_cache_dir, get_font_asset, load_font, load_sound
 
 logger = logging.getLogger(__name__)
 
 SCREEN_SIZE = 1280, 720
+GLYPH_CACHE_VERSION = 1
+GLYPH_PADDING = 8
 
 """
 bootup sound:
@@ -37,20 +43,112 @@ def ternone(value, default):
     return default if value is None else value
 
 
-def load_sound(filename):
-    return pygame.mixer.Sound(get_sound_asset(filename))
+def get_glyph_size(font, ratio):
+    natural_size = font.render('W', 1, (0, 0, 0)).get_size()
+    return (natural_size[0] + GLYPH_PADDING * 2) * ratio, (natural_size[1] + GLYPH_PADDING * 2) * ratio
 
 
-def load_image(filename):
-    return pygame.image.load(get_image_asset(filename))
+def render_glyph_atlas(font, glyph_size, ratio, color, charset):
+    """ Render the glyphs of charset in a row, with bloom and scanlines """
+    padding = GLYPH_PADDING
+    scratch = glyph_size[0] // ratio, glyph_size[1] // ratio
 
+    # generate a scanline image to create scanline effect
+    scanline = pygame.Surface(glyph_size, pygame.SRCALPHA)
+    scolor = (64, 64, 64)
+    for y in range(0, glyph_size[1], 4):
+        scanline.fill(scolor, (0, y, glyph_size[0], 2))
 
-def load_font(name, size):
-    return pygame.font.Font(get_font_asset(name), size)
+    atlas = pygame.Surface((glyph_size[0] * len(charset), glyph_size[1]), pygame.SRCALPHA)
+    for index, char in enumerate(charset):
+        original = font.render(char, 1, color)
+
+        glyph = pygame.Surface(scratch, pygame.SRCALPHA)
+        glyph.blit(original, (padding, padding))
+
+        large_glyph = smoothscale(glyph, glyph_size)
+
+        bloom = smoothscale(glyph, (10, int(scratch[1] * .80)))
+        bloom = smoothscale(bloom, glyph_size)
+
+        # draw in place, blitting a finished glyph would blend it with the empty atlas
+        image = atlas.subsurface((index * glyph_size[0], 0) + tuple(glyph_size))
+        image.blit(bloom, (0, 0))
+
+        image.blit(large_glyph, (0, 0))
+        image.blit(scanline, (0, 0), None, pygame.BLEND_SUB)
+
+    return atlas
+
+
+def get_atlas_path(cache_dir, font_name, font_size, ratio, color, charset):
+    """ Name the atlas after everything that changes how the glyphs look """
+    with open(get_font_asset(font_name), 'rb') as fob:
+        digest = hashlib.sha1(fob.read())
+    digest.update(repr((font_size, ratio, tuple(color), charset)).encode('utf-8'))
+    return os.path.join(cache_dir, "%s-v%d.rgba" % (digest.hexdigest(), GLYPH_CACHE_VERSION))
+
+
+def load_glyph_atlas(cache_path, glyph_size, count):
+    """ Map a saved atlas into memory, or return None if there isn't a usable one
+
+    The surface uses the mapped file as its pixels, so nothing is read
+    until the glyphs are drawn.
+    """
+    size = glyph_size[0] * count, glyph_size[1]
+    try:
+        with open(cache_path, 'rb') as fob:
+            # a private copy, so the file can't change under the surface
+            buffer = mmap.mmap(fob.fileno(), 0, access=mmap.ACCESS_COPY)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        logger.warning("Ignoring unreadable glyph atlas \"%s\"" % cache_path)
+        return None
+
+    if len(buffer) != size[0] * size[1] * 4:
+        logger.warning("Ignoring glyph atlas \"%s\" of the wrong size" % cache_path)
+        buffer.close()
+        return None
+
+    return pygame.image.frombuffer(buffer, size, 'RGBA')
+
+
+def save_glyph_atlas(cache_path, atlas):
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".tmp")
+    except OSError:
+        logger.warning("Could not write glyph atlas \"%s\"" % cache_path)
+        return
+    try:
+        with os.fdopen(fd, 'wb') as fob:
+            fob.write(pygame.image.tostring(atlas, 'RGBA'))
+        os.replace(temp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        logger.warning("Could not write glyph atlas \"%s\"" % cache_path)
 
 
 class Jackin(Minigame):
     GAME_NAME = "Jackin"
+    ASSETS = (
+        ('font', 'Apple ][.ttf', 8),
+        ('sound', 'run.wav'),
+        ('sound', 'boot.wav'),
+        ('sound', 'beep.wav'),
+        ('sound', '188828__0ktober__modem-dial.wav'),
+        ('sound', 'spacebar01.wav'),
+        ('sound', 'spacebar02.wav'),
+        ('sound', 'keypress01.wav'),
+        ('sound', 'keypress02.wav'),
+        ('sound', 'keypress04.wav'),
+        ('sound', 'keypress05.wav'),
+        ('sound', 'keypress06.wav'),
+    )
+    FRAME_RATE = 60
     _default_layer = 1
 
     charset = "1234567890QWERTYUIOPASDFGHJKLZXCVBNM,.?>&/="
@@ -67,17 +165,18 @@ class Jackin(Minigame):
         self.cache = None
         self.char_height = 0
         self.char_width = 0
+        self.glyph_size = None
         self.platten = None
         self.paper = None
+        self.paper_surface = None
         self.mode = None
         self.fade_buffer = None
         self.screen_size = None
 
         self.cursor = Vector2(200, -70)
 
-        self.document = list()
-        self.document.append(list())
         self.current_line = 0
+        self.first_line = 0  # line at the top of paper_surface
 
         font_name = 'Apple ][.ttf'
         font_size = 8
@@ -119,7 +218,7 @@ class Jackin(Minigame):
 
         }
 
-        self.generate_font(font_name, font_size, ratio, color)
+        self.generate_font(font_name, font_size, ratio, color, get_cache_dir('glyphs'))
         self.set_tab(0)
 
     def next_command(self):
@@ -173,53 +272,27 @@ class Jackin(Minigame):
         task = Task(self.next_command, interval=random.randint(600, 800))
         self._animations.add(task)
 
-    def generate_font(self, font_name, font_size, ratio, color):
-        self.cache = dict()
-
-        padding = 8
-        padding2 = padding * 2
-
-        font = pygame.font.Font(get_font_asset(font_name), font_size)
-        glyph = font.render('W', 1, (0, 0, 0))
-
-        natural_size = glyph.get_size()
-        scratch = natural_size[0] + padding2, natural_size[1] + padding2
-        full_size = scratch[0] * ratio, scratch[1] * ratio
-
-        # generate a scanline image to create scanline effect
-        scanline = pygame.Surface(full_size, pygame.SRCALPHA)
-        scolor = (64, 64, 64)
-        for y in range(0, full_size[1], 4):
-            pygame.draw.line(scanline, scolor, (0, y), (full_size[0], y))
-            pygame.draw.line(scanline, scolor, (0, y + 1), (full_size[0], y + 1))
-
-        for char in self.charset:
-            original = font.render(char, 1, color)
-
-            lined = pygame.Surface(natural_size, pygame.SRCALPHA)
-            lined.blit(original, (0, 0))
-            lined.blit(scanline, (0, 0))
-
-            glyph = pygame.Surface(scratch, pygame.SRCALPHA)
-            glyph.blit(original, (padding, padding))
-
-            large_glyph = smoothscale(glyph, full_size)
-
-            # norml_glyph.blit(scanline, (0, 0))
-
-            bloom = smoothscale(glyph, (10, int(scratch[1] * .80)))
-            bloom = smoothscale(bloom, full_size)
-
-            image = pygame.Surface(full_size, pygame.SRCALPHA)
-            image.blit(bloom, (0, 0))
-
-            image.blit(large_glyph, (0, 0))
-            image.blit(scanline, (0, 0), None, pygame.BLEND_SUB)
-
-            self.cache[char] = image
-
-        self.char_width = int(full_size[0] * .3)
-        self.char_height = int(full_size[1] * .35)
+    def generate_font(self, font_name, font_size, ratio, color, cache_dir=None):
+        """ Render the glyphs of charset, reusing the atlas in cache_dir if it was rendered before """
+        font = load_font(font_name, font_size)
+        glyph_size = get_glyph_size(font, ratio)
+
+        atlas = None
+        if cache_dir is not None:
+            cache_path = get_atlas_path(cache_dir, font_name, font_size, ratio, color, self.charset)
+            atlas = load_glyph_atlas(cache_path, glyph_size, len(self.charset))
+        if atlas is None:
+            atlas = render_glyph_atlas(font, glyph_size, ratio, color, self.charset)
+            if cache_dir is not None:
+                save_glyph_atlas(cache_path, atlas)
+
+        width, height = glyph_size
+        self.cache = {char: atlas.subsurface((index * width, 0, width, height))
+                      for index, char in enumerate(self.charset)}
+
+        self.glyph_size = glyph_size
+        self.char_width = int(width * .3)
+        self.char_height = int(height * .35)
         page_width = self.char_width * self.cpl
         self.platten = pygame.Rect(0, self.cursor.y, page_width, 100)
         self.paper = pygame.Rect(0, self.cursor.y, page_width, 1000)
@@ -244,15 +317,12 @@ class Jackin(Minigame):
                           layer=ternone(layer, self._default_layer))
 
     def run(self, context):
-        flip = pygame.display.flip
+        flip = headless.flip
         update = self.update
         draw = self.draw
         handle_events = self.handle_event
         screen = pygame.display.get_surface()
-        clock = time.time
-        frame_time = (1 / 60.) * 1000
-        last_draw = 0
-        times = deque(maxlen=10)
+        clock = pygame.time.Clock()
 
         self.sounds['boot'].play()
         self.sounds['run'].play(-1, fade_ms=200)
@@ -261,25 +331,45 @@ class Jackin(Minigame):
         self._animations.add(task)
 
         self.screen_size = screen.get_size()
+        self.load_paper()
 
         self.running = True
-        last_frame = clock()
         while self.running:
-            dt = (clock() - last_frame) * 1000
-            last_frame = clock()
-            times.append(dt)
-            dt = sum(times) / 10
-            last_draw += dt
-            handle_events()
-            update(dt)
-            if last_draw >= frame_time:
+            dt = clock.tick(self.FRAME_RATE)
+            with profiler.scope("events"):
+                handle_events()
+            with profiler.scope("update"):
+                update(dt)
+            with profiler.scope("draw"):
                 draw(screen)
-
                 if self.fade_buffer:
                     screen.blit(self.fade_buffer, (0, 0))
 
-                flip()
-                last_draw = 0
+            flip()
+
+    def load_paper(self):
+        """ Make the surface that struck glyphs are kept on
+
+        It is as tall as the part of the paper on the screen, plus room
+        for glyphs hanging below the last line.  Glyphs are drawn on it
+        once, and every frame it is drawn where the platten is.
+        """
+        width = int(self.cursor.x) + self.paper.width + self.glyph_size[0]
+        height = self.screen_size[1] - self.paper.top + self.glyph_size[1]
+        self.paper_surface = pygame.Surface((width, height)).convert()
+        self.paper_surface.fill((0, 0, 0))
+        self.first_line = self.current_line
+
+    def feed_paper(self):
+        """ Scroll the paper up until the current line is on the screen, reusing the lines that go off the top """
+        visible_lines = (self.screen_size[1] - self.paper.top - 10) // self.char_height
+        lines = self.current_line - self.first_line - visible_lines + 1
+        if lines > 0:
+            height = lines * self.char_height
+            self.paper_surface.scroll(0, -height)
+            bottom = self.paper_surface.get_height() - height
+            self.paper_surface.fill((0, 0, 0), (0, bottom, self.paper_surface.get_width(), height))
+            self.first_line += lines
 
     def draw(self, surface):
         self._sprites.draw(surface)
@@ -287,13 +377,7 @@ class Jackin(Minigame):
         surface.fill((0, 0, 0))
 
         self.paper.left = self.platten.left
-
-        for line_index, line in enumerate(self.document):
-            for position, glyph in line:
-                gx, gy = position
-                x = gx
-                y = gy + (line_index * self.char_height)
-                surface.blit(glyph, self.paper.move(x, y))
+        surface.blit(self.paper_surface, self.paper)
 
     def update(self, dt):
         self._animations.update(dt)
@@ -319,12 +403,14 @@ class Jackin(Minigame):
 
         try:
             glyph = self.cache[char]
-            position = [int(self.cursor.x - self.paper.left), 10]
-            self.document[self.current_line].append((position, glyph))
-            self.advance_one(now)
-            return glyph
         except KeyError:
-            pass
+            return
+
+        x = int(self.cursor.x - self.paper.left)
+        y = 10 + (self.current_line - self.first_line) * self.char_height
+        self.paper_surface.blit(glyph, (x, y))
+        self.advance_one(now)
+        return glyph
 
     def advance_one(self, now=False):
         if now:
@@ -382,7 +468,7 @@ class Jackin(Minigame):
         :return:
         """
         self.current_line += 1
-        self.document.append(list())
+        self.feed_paper()
         self.set_tab(0)
 
     def set_tab(self, tab=0):
@@ -9,7 +9,7 @@ import time
 from pytmx.pytmx import TiledTileLayer
 
 from patchworkorange.core.minigamemanager import Minigame
-from patchworkorange.core import resources
+from patchworkorange.core import headless, resources
 
 logger = getLogger(__name__)
 
@@ -20,6 +20,12 @@ GAME_DICT = {}
 
 class Mastermind(Minigame):
     GAME_NAME = "Mastermind"
+    ASSETS = (
+        ('image', 'mastermind/access_granted.png'),
+        ('image', 'mastermind/danger_location_compromised.png'),
+        ('image', 'mastermind/invalid_code.png'),
+        ('sysfont', 'monospace', 15, True, False),
+    )
 
     def __init__(self, **kwargs):
         self.background = None
@@ -43,7 +49,7 @@ class Mastermind(Minigame):
         self.screen = pygame.display.get_surface()
         self.clock = pygame.time.Clock()
         pygame.display.set_caption("Mastermind")
-        self.font = pygame.font.SysFont("monospace", 15, bold=True)
+        self.font = resources.load_sys_font("monospace", 15, bold=True)
 
         self.setup_game()
 
@@ -53,17 +59,17 @@ class Mastermind(Minigame):
             game_loop = self.update()
             self.render(self.screen)
 
-            pygame.display.flip()
+            headless.flip()
             self.clock.tick(60)
 
         if self.goal_met():
-            ic_sfc = pygame.image.load(resources.get_image_asset(
-                os.path.join("mastermind", "access_granted.png")))
+            ic_sfc = resources.load_image(
+                os.path.join("mastermind", "access_granted.png"))
             WINDOW_SIZE = pygame.display.get_surface().get_rect().size
             self.screen.blit(ic_sfc, (WINDOW_SIZE[0]//2 - ic_sfc.get_width()//2,
                                       WINDOW_SIZE[1]//2 - ic_sfc.get_height()//2))
 
-            pygame.display.flip()
+            headless.flip()
 
             time.sleep(1)
             pygame.mouse.set_visible(False)
@@ -72,13 +78,13 @@ class Mastermind(Minigame):
             context["{}.won".format(self.GAME_NAME)] = "true"
 
         if self.threat >= 10:
-            ic_sfc = pygame.image.load(resources.get_image_asset(
-                os.path.join("mastermind", "danger_location_compromised.png")))
+            ic_sfc = resources.load_image(
+                os.path.join("mastermind", "danger_location_compromised.png"))
             self.screen.blit(ic_sfc, (WINDOW_SIZE[0]//2 - ic_sfc.get_width()//2,
                                       WINDOW_SIZE[1]//2 - ic_sfc.get_height()//2))
             context["{}.won".format(self.GAME_NAME)] = "false"
 
-            pygame.display.flip()
+            headless.flip()
 
             time.sleep(1)
             pygame.mouse.set_visible(False)
@@ -178,7 +184,7 @@ class Mastermind(Minigame):
         self.render_threat(screen)
 
         if self.invalid_code:
-            ic_sfc = pygame.image.load(resources.get_image_asset(os.path.join("mastermind", "invalid_code.png")))
+            ic_sfc = resources.load_image(os.path.join("mastermind", "invalid_code.png"))
             screen.blit(ic_sfc, (WINDOW_SIZE[0]//2 - ic_sfc.get_width()//2, WINDOW_SIZE[1]//2 - ic_sfc.get_height()//2))
 
     def render_layers(self, screen):
@@ -5,7 +5,7 @@ import pygame
 import pytmx.util_pygame
 from pytmx.pytmx import TiledTileLayer
 
-from patchworkorange.core import resources
+from patchworkorange.core import headless, resources
 from patchworkorange.core.minigamemanager import Minigame
 
 BLOCK_SIZE = (32, 32)
@@ -46,7 +46,7 @@ class Sokoban(Minigame):
             game_loop = self.update()
             self.render(self.screen)
 
-            pygame.display.flip()
+            headless.flip()
             self.clock.tick(60)
 
         if self.goal_met():
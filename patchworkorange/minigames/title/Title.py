@@ -4,20 +4,17 @@ import pygame
 from pygame.transform import smoothscale
 
 from patchworkorange import GAME_TITLE
+from patchworkorange.core import headless
 from patchworkorange.core.minigamemanager import Minigame
-from patchworkorange.core.resources import get_image_asset, get_font_asset, get_sound_asset
-
-
-def load_image(filename):
-    return pygame.image.load(get_image_asset(filename))
-
-
-def load_font(name, size):
-    return pygame.font.Font(get_font_asset(name), size)
+from patchworkorange.core.resources import get_sound_asset, load_image, load_font
 
 
 class Title(Minigame):
     GAME_NAME = "Title"
+    ASSETS = (
+        ('font', 'Closeness-Bold-Italic.ttf', 90),
+        ('image', 'title.jpg'),
+    )
 
     def initialize(self, context):
         pass
@@ -32,11 +29,11 @@ class Title(Minigame):
         bkg = smoothscale(bkg, surface.get_size())
         surface.blit(bkg, (0, 0))
         surface.blit(text_surface, (64, 400))
-        pygame.display.flip()
+        headless.flip()
         while True:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     sys.exit(0)
                 elif event.type in {pygame.KEYUP, pygame.MOUSEBUTTONUP}:
-                    pygame.mixer.music.fadeout(800)
+                    headless.fadeout_music(800)
                     return
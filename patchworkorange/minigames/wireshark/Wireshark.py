@@ -6,8 +6,8 @@ from logging import getLogger
 from patchworkorange.core.minigamemanager import Minigame
 from pygame import USEREVENT as TIMER_ID
 from pygame.sprite import Sprite
-from patchworkorange.core import resources
-import random
+from patchworkorange.core import headless, resources
+from patchworkorange.core.loop import FixedStepLoop, interpolate
 import pygame
 import time
 import os
@@ -18,8 +18,12 @@ NEXT_ATTACKER = 1
 
 class Wireshark(Minigame):
     GAME_NAME = "Wireshark"
+    ASSETS = (
+        ('image', 'wireshark/cloud.png'),
+        ('image', 'wireshark/bits.png'),
+        ('sysfont', 'monospace', 15, True, False),
+    )
     UPDATE_FREQUENCY = 300
-    FRAME_DELAY = 1000.0 / 60.0
     MAX_ATTACKERS = 6
     PACKET_SPAWN_INTERVAL = 600
     ATTACKER_SPAWN_INTERVAL = 1800
@@ -31,7 +35,7 @@ class Wireshark(Minigame):
     def __init__(self, **kwargs):
         self.screen = None
         self.player = None
-        self.clock = None
+        self.loop = None
         self.key_held = False
         self.attackers = []
         self.remaining_attacker_positions = []
@@ -46,11 +50,11 @@ class Wireshark(Minigame):
     def initialize(self, context):
         logger.debug("Wireshark started")
         self.screen = pygame.display.set_mode(WINDOW_SIZE)
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.SysFont("monospace", 15, bold=True)
+        self.loop = FixedStepLoop(self.update, self.render, self.UPDATE_FREQUENCY)
+        self.font = resources.load_sys_font("monospace", 15, bold=True)
 
         self.key = ""
-        self.key_map = random.sample(range(len(Wireshark.SECRET)), len(Wireshark.SECRET))
+        self.key_map = self.loop.rng.sample(range(len(Wireshark.SECRET)), len(Wireshark.SECRET))
         self.remaining_attacker_positions = [x * 32 for x in range(WINDOW_SIZE[0] // 32)]
         self.player = Player()
         self.leak_bar = LeakBar(20, 5)
@@ -61,16 +65,7 @@ class Wireshark(Minigame):
         pygame.mouse.set_visible(False)
 
     def run(self, context):
-        game_loop = True
-        delta_accumulater = 0.0
-        while game_loop:
-            delta = self.clock.tick(self.UPDATE_FREQUENCY)
-            delta_accumulater += delta
-            if delta_accumulater >= self.FRAME_DELAY:
-                self.render()
-                delta_accumulater = 0.0
-            game_loop = self.update(delta)
-            pygame.display.flip()
+        self.loop.run()
 
         if self.win_condition():
             context["{}.won".format(self.GAME_NAME)] = "true"
@@ -79,7 +74,7 @@ class Wireshark(Minigame):
         if self.leaks > Wireshark.MAX_LEAKS:
             context["{}.won".format(self.GAME_NAME)] = "false"
 
-        pygame.display.flip()
+        headless.flip()
 
     def update(self, delta):
         if not self.handle_events(delta):
@@ -105,16 +100,16 @@ class Wireshark(Minigame):
 
         return False if self.win_condition() else True
 
-    def render(self):
+    def render(self, alpha=1.0):
         self.screen.fill(pygame.Color("BLACK"))
 
-        self.player.render(self.screen)
+        self.player.render(self.screen, alpha)
 
         for attacker in self.attackers:
             attacker.render(self.screen)
 
         for packet in self.packets:
-            packet.render(self.screen)
+            packet.render(self.screen, alpha)
 
         self.render_key()
         self.leak_bar.render(self.screen, self.leaks)
@@ -134,10 +129,10 @@ class Wireshark(Minigame):
                 if len(self.attackers) < Wireshark.MAX_ATTACKERS:
                     self.spawn_attacker()
             if event.type == TIMER_ID+2:
-                random_attacker = random.randint(0, len(self.attackers)-1)
+                random_attacker = self.loop.rng.randint(0, len(self.attackers)-1)
                 self.packets.append(self.attackers[random_attacker].sendPacket())
             if event.type == TIMER_ID+3:
-                self.key = random.sample(Wireshark.SECRET, len(Wireshark.SECRET))
+                self.key = self.loop.rng.sample(Wireshark.SECRET, len(Wireshark.SECRET))
                 decrypted_key = self.key
                 for i in range(self.score):
                     decrypted_key[self.key_map[i]] = Wireshark.SECRET[self.key_map[i]]
@@ -162,7 +157,7 @@ class Wireshark(Minigame):
         return False
 
     def spawn_attacker(self):
-        slot = random.randint(0, len(self.remaining_attacker_positions) - 1)
+        slot = self.loop.rng.randint(0, len(self.remaining_attacker_positions) - 1)
         x = self.remaining_attacker_positions[slot]
         self.remaining_attacker_positions.pop(slot)
         self.attackers.append(Attacker(x, 50))
@@ -184,11 +179,14 @@ class Player(object):
     def __init__(self):
         self.pos = (320.0, 400.0)
         self.rect = pygame.Rect(self.pos, Player.SIZE)
+        self.previous_pos = self.rect.topleft
 
-    def render(self, screen):
-        pygame.draw.rect(screen, pygame.Color("blue"), self.rect)
+    def render(self, screen, alpha=1.0):
+        rect = pygame.Rect(interpolate(self.previous_pos, self.rect.topleft, alpha), Player.SIZE)
+        pygame.draw.rect(screen, pygame.Color("blue"), rect)
 
     def update(self):
+        self.previous_pos = self.rect.topleft
         self.rect.topleft = self.pos
 
     def move(self, key, delta):
@@ -206,7 +204,7 @@ class Attacker(Sprite):
 
     def __init__(self, x, y):
         super(Attacker, self).__init__()
-        self.image = pygame.image.load(resources.get_image_asset(os.path.join("wireshark", "cloud.png"))).convert()
+        self.image = resources.load_image(os.path.join("wireshark", "cloud.png")).convert()
         self.pos = (x, y)
         self.rect = pygame.Rect(self.pos, Attacker.SIZE)
         self.image.set_colorkey((255, 0, 255))
@@ -227,15 +225,17 @@ class Packet(Sprite):
 
     def __init__(self, x, y):
         super(Sprite, self).__init__()
-        self.image = pygame.image.load(resources.get_image_asset(os.path.join("wireshark", "bits.png"))).convert()
+        self.image = resources.load_image(os.path.join("wireshark", "bits.png")).convert()
         self.image.set_colorkey((255, 0, 255))
         self.pos = (x, y)
         self.rect = pygame.Rect(self.pos, Packet.SIZE)
+        self.previous_pos = self.rect.topleft
 
-    def render(self, screen):
-        screen.blit(self.image, self.rect)
+    def render(self, screen, alpha=1.0):
+        screen.blit(self.image, interpolate(self.previous_pos, self.rect.topleft, alpha))
 
     def update(self):
+        self.previous_pos = self.rect.topleft
         self.rect.topleft = self.pos
 
     def move(self, delta):
@@ -3,10 +3,10 @@ from functools import partial
 from patchworkorange.core.minigamemanager import Minigame
 from logging import getLogger
 import pygame
-import random
 from pygame import USEREVENT as TIMER_ID
 from pygame.sprite import Group, Sprite
 from patchworkorange.core import resources
+from patchworkorange.core.loop import FixedStepLoop
 import os
 
 from animation import Animation
@@ -18,9 +18,14 @@ WINDOW_SIZE = (1280, 720)
 
 class Xbill(Minigame):
     GAME_NAME = "Xbill"
+    ASSETS = (
+        ('image', 'xbill/terminal.png'),
+        ('image', 'xbill/terminal_infected.png'),
+        ('image', 'xbill/bill.png'),
+        ('sysfont', 'monospace', 15, True, False),
+    )
 
     UPDATE_FREQUENCY = 300
-    FRAME_DELAY = 1000.0 / 60.0
 
     GAME_DURATION = 60*1000
 
@@ -29,7 +34,7 @@ class Xbill(Minigame):
     def __init__(self, **kwargs):
         self.background = None
         self.screen = None
-        self.clock = None
+        self.loop = None
         self.font = None
         self.terminals = []
         self.bills = []
@@ -38,8 +43,8 @@ class Xbill(Minigame):
 
     def initialize(self, context):
         self.screen = pygame.display.set_mode(WINDOW_SIZE)
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.SysFont("monospace", 15, bold=True)
+        self.loop = FixedStepLoop(self.update, self.render, self.UPDATE_FREQUENCY)
+        self.font = resources.load_sys_font("monospace", 15, bold=True)
 
         self.countdown = Xbill.GAME_DURATION
 
@@ -60,16 +65,7 @@ class Xbill(Minigame):
         pygame.time.set_timer(TIMER_ID+1, Xbill.BILL_SPAWN_INTERVAL)
 
     def run(self, context):
-        game_loop = True
-        delta_accumulater = 0.0
-        while game_loop:
-            delta = self.clock.tick(self.UPDATE_FREQUENCY)
-            delta_accumulater += delta
-            if delta_accumulater >= self.FRAME_DELAY:
-                self.render()
-                delta_accumulater = 0.0
-            game_loop = self.update(delta)
-            pygame.display.flip()
+        self.loop.run()
 
         if self.countdown <= 0:
             context["{}.won".format(self.GAME_NAME)] = "true"
@@ -105,7 +101,7 @@ class Xbill(Minigame):
 
         return True
 
-    def render(self):
+    def render(self, alpha=1.0):
         self.screen.fill(pygame.Color("BLACK"))
 
         for terminal in self.terminals:
@@ -154,22 +150,22 @@ class Xbill(Minigame):
     def get_free_terminal(self):
         free_terminals = [terminal for terminal in self.terminals if not terminal.infected]
         if len(free_terminals) > 0:
-            return random.choice(free_terminals)
+            return self.loop.rng.choice(free_terminals)
         else:
             return None
 
     def send_bill(self):
-        area = random.randint(1, 4)
+        area = self.loop.rng.randint(1, 4)
         width = 16
         x, y = (0, 0)
         if area == 1: # LEFT
-            x, y = (16, random.randint(width, 720-width*3))
+            x, y = (16, self.loop.rng.randint(width, 720-width*3))
         if area == 2: # RIGHT
-            x, y = (1280-width*3, random.randint(width, 720-width*3))
+            x, y = (1280-width*3, self.loop.rng.randint(width, 720-width*3))
         if area == 3: # TOP
-            x, y = (random.randint(width, 1280-width*3), width)
+            x, y = (self.loop.rng.randint(width, 1280-width*3), width)
         if area == 4: # BOTTOM
-            x, y = (random.randint(width, 1280-width*3), 720-width*3)
+            x, y = (self.loop.rng.randint(width, 1280-width*3), 720-width*3)
         return Bill(x, y)
 
 class Terminal(Sprite):
@@ -177,7 +173,7 @@ class Terminal(Sprite):
 
     def __init__(self, x, y):
         super(Terminal, self).__init__()
-        self.image = pygame.image.load(resources.get_image_asset(os.path.join("xbill", "terminal.png"))).convert()
+        self.image = resources.load_image(os.path.join("xbill", "terminal.png")).convert()
         self.pos = (x, y)
         self.rect = pygame.Rect(self.pos, Terminal.SIZE)
         self.block_duration = 0.0
@@ -199,7 +195,7 @@ class Bill(Sprite):
     SIZE = (32, 50)
     def __init__(self, x, y):
         super(Bill, self).__init__()
-        self.image = pygame.image.load(resources.get_image_asset(os.path.join("xbill", "bill.png"))).convert()
+        self.image = resources.load_image(os.path.join("xbill", "bill.png")).convert()
         self.pos = (x, y)
         self.animations = Group()
         self.rect = pygame.Rect(self.pos, Bill.SIZE)
@@ -223,7 +219,7 @@ class Bill(Sprite):
     def on_arrived_at_terminal(self, terminal):
         if terminal.block_duration == 0:
             terminal.infected = True
-            terminal.image = pygame.image.load(resources.get_image_asset(os.path.join("xbill", "terminal_infected.png"))).convert()
+            terminal.image = resources.load_image(os.path.join("xbill", "terminal_infected.png")).convert()
         self.destroy = True
 
 class FloatingText(object):